@@ -0,0 +1,62 @@
+# Shared parts of SudokuBenchmark and RubiksBenchmark: latency percentiles and
+# the JSON reports that a run writes and a later run compares against.
+
+import json
+import math
+import sys
+from typing import Callable, List, Optional, Tuple
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def compare(old: dict, new: dict, latency: Tuple[str, str, str], other: Tuple[str, str, str],
+            threshold: float = 0.2, regressed: Optional[Callable[[dict, dict], bool]] = None) -> List[str]:
+    """
+        Print how each pair in both reports moved and return the pairs that
+        regressed: those whose latency grew by more than `threshold` (a
+        fraction), or for which regressed(before, after) is true. `latency`
+        and `other` are the (label, field, format spec) of the two results
+        printed as before->after, such as ("p50 ms", "p50_ms", "8.2f").
+    """
+    keys = [key for key in new["results"] if key in old["results"]]
+    width = max([len("pair")] + [len(key) for key in keys])
+    label, field, spec = latency
+    other_label, other_field, other_spec = other
+    print(f"{'pair':>{width}} {label:>{2 * len(format(0, spec)) + 2}} {'change':>8} "
+          f"{other_label:>{2 * len(format(0, other_spec)) + 2}}")
+
+    regressions = []
+    for key in keys:
+        before, after = old["results"][key], new["results"][key]
+        change = after[field] / before[field] - 1 if before[field] else 0.0
+        worse = change > threshold or regressed is not None and regressed(before, after)
+        if worse:
+            regressions.append(key)
+        print(f"{key:>{width}} {before[field]:>{spec}}->{after[field]:<{spec}} {change:>+8.1%} "
+              f"{before[other_field]:>{other_spec}}->{after[other_field]:<{other_spec}}"
+              f"{'  REGRESSION' if worse else ''}")
+    return regressions
+
+def add_report_arguments(parser) -> None:
+    """The --json, --compare and --threshold options that save_report() reads."""
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="diff against results written earlier with --json")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="p50 slowdown (as a fraction) that counts as a regression")
+
+def save_report(report: dict, args, compare_reports: Callable[[dict, dict, float], List[str]]) -> None:
+    """
+        Write the report to the --json file, then diff it against the
+        --compare file with compare_reports(old, new, threshold) and exit
+        with an error if any pair regressed.
+    """
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        if regressions:
+            sys.exit(f"{len(regressions)} regression(s): {', '.join(regressions)}")
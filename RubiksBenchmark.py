@@ -0,0 +1,149 @@
+# Benchmarks for RubiksCube
+
+import argparse
+import platform
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import Benchmark
+from Benchmark import percentile
+from RubiksCube import MoveProfile, RubiksCube
+
+# Histogram buckets of per-move latency: powers of two from 250ns to about 1s
+BUCKET_BOUNDS_NS = [250 * 2 ** i for i in range(23)]
+
+def _face(method, face):
+    # Clockwise and anticlockwise turns of one face, taken in turn
+    return lambda cube, i: getattr(cube, method)(face if i % 2 else face + "'")
+
+def _middle(axis):
+    return lambda cube, i: cube.rotate_middle(cube.size // 2, axis, "CW" if i % 2 else "CCW")
+
+def _layer(axis):
+    return lambda cube, i: cube.rotate_layer(cube.size // 2, axis, i % 2 == 1)
+
+# Every move family as a call on the cube, and the smallest size it works on
+FAMILIES = {
+    "front": (_face("rotate_front", "F"), 1),
+    "back": (_face("rotate_back", "B"), 1),
+    "up": (_face("rotate_up", "U"), 1),
+    "down": (_face("rotate_down", "D"), 1),
+    "left": (_face("rotate_left", "L"), 1),
+    "right": (_face("rotate_right", "R"), 1),
+    "middle_x": (_middle("X"), 3),
+    "middle_y": (_middle("Y"), 3),
+    "middle_z": (_middle("Z"), 3),
+    "layer_x": (_layer(0), 1),
+    "layer_y": (_layer(1), 1),
+    "layer_z": (_layer(2), 1),
+}
+
+def histogram(latencies_ns: List[int]) -> List[int]:
+    """Counts of latencies at or below each of BUCKET_BOUNDS_NS, with one more bucket for the rest."""
+    buckets = np.searchsorted(BUCKET_BOUNDS_NS, latencies_ns)
+    return np.bincount(buckets, minlength=len(BUCKET_BOUNDS_NS) + 1).tolist()
+
+def bench_family(size: int, family: str, moves: int = 2000, warmup: int = 50) -> dict:
+    """
+        Time `moves` calls of one move family on a cube of the given size,
+        each timed on its own, and summarise them. The cube is scrambled
+        first, and each call alternates direction so the cube keeps changing.
+    """
+    move, _ = FAMILIES[family]
+    cube = RubiksCube(size)
+    cube.scramble(20, seed=size)
+    for i in range(warmup):
+        move(cube, i)
+
+    clock = time.perf_counter_ns
+    latencies = []
+    start = clock()
+    for i in range(moves):
+        before = clock()
+        move(cube, i)
+        latencies.append(clock() - before)
+    total = (clock() - start) / 1e9
+
+    return {
+        "moves": moves,
+        "moves_per_s": moves / total if total else 0.0,
+        "mean_us": sum(latencies) / moves / 1e3,
+        "p50_us": percentile(latencies, 0.50) / 1e3,
+        "p99_us": percentile(latencies, 0.99) / 1e3,
+        "histogram": histogram(latencies),
+    }
+
+def bench_suite(sizes=(2, 3, 4, 5, 10, 20, 50, 100, 200), families=tuple(FAMILIES), moves: int = 2000) -> dict:
+    """Run every move family on every size, printing one line per pair, and return the JSON-ready report."""
+    results = {}
+    print(f"{'size':>5} {'family':>9} {'moves/s':>10} {'mean us':>9} {'p50 us':>8} {'p99 us':>8}")
+    for size in sizes:
+        for family in families:
+            if size < FAMILIES[family][1]:
+                continue
+            result = bench_family(size, family, moves)
+            results[f"{size}/{family}"] = result
+            print(f"{size:>5} {family:>9} {result['moves_per_s']:>10,.0f} {result['mean_us']:>9.2f} "
+                  f"{result['p50_us']:>8.2f} {result['p99_us']:>8.2f}")
+    return {
+        "meta": {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+                 "moves": moves, "bucket_bounds_ns": BUCKET_BOUNDS_NS, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+def compare(old: dict, new: dict, threshold: float = 0.2) -> List[str]:
+    """
+        Print how each size/family pair moved between two reports and return
+        the pairs that regressed: those whose p50 latency grew by more than
+        `threshold` (a fraction). The median is used because single moves
+        take microseconds, where the mean and the tail mostly measure the
+        machine.
+    """
+    return Benchmark.compare(old, new, ("p50 us", "p50_us", "8.2f"), ("moves/s", "moves_per_s", "11,.0f"), threshold)
+
+def profile_scramble(size: int, moves: int, seed: int = 0) -> Dict[str, dict]:
+    """
+        Scramble an instrumented cube with `moves` random turns and print how
+        the time splits across move families, as a sample of what
+        RubiksCube.instrument() reports on a real workload.
+    """
+    cube = RubiksCube(size)
+    profile = MoveProfile()
+    cube.instrument(profile)
+    cube.scramble(moves, seed)
+    info = profile.info()
+    total = sum(family["seconds"] for family in info.values())
+    print(f"{'family':>9} {'count':>8} {'mean us':>9} {'share':>7}")
+    for family, result in info.items():
+        print(f"{family:>9} {result['count']:>8} {result['mean_us']:>9.2f} {result['seconds'] / total:>7.1%}")
+    return info
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for RubiksCube.")
+    commands = parser.add_subparsers(dest="command")
+
+    suite = commands.add_parser("suite", help="time every move family across cube sizes (the default)")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[2, 3, 4, 5, 10, 20, 50, 100, 200])
+    suite.add_argument("--families", nargs="+", choices=list(FAMILIES), default=list(FAMILIES))
+    suite.add_argument("--moves", type=int, default=2000, help="timed moves per size and family")
+    Benchmark.add_report_arguments(suite)
+
+    profile = commands.add_parser("profile", help="break down the time of a random scramble by move family")
+    profile.add_argument("--size", type=int, default=3)
+    profile.add_argument("--moves", type=int, default=100000)
+    profile.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "profile":
+        profile_scramble(args.size, args.moves, args.seed)
+        return
+    if args.command is None:
+        args = suite.parse_args([])
+
+    report = bench_suite(args.sizes, args.families, args.moves)
+    Benchmark.save_report(report, args, compare)
+
+if __name__ == "__main__":
+    main()
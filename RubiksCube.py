@@ -1,7 +1,556 @@
 # Implement a datastructure for a Rubik's Cube, allow for flexibility in the size of the cube and the logic of rotations
 
-import numpy as np
+import io
+import mmap
+import multiprocessing
+import os
+import re
+import struct
+import sys
 import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from functools import lru_cache
+
+import numpy as np
+
+# Face order of the sticker array, and the colour each face shows when solved.
+FACES = "UDLRFB"
+COLORS = "WYGBRO"
+COLOR_CODES = {color: code for code, color in enumerate(COLORS)}
+FACE_INDEX = {face: index for index, face in enumerate(FACES)}
+
+# Bit weights of the 3-bit colour codes in to_bytes(), most significant first
+_CODE_BITS = np.array([4, 2, 1], dtype=np.uint8)
+# Colour letters by code, as bytes for rendering
+_LETTERS = np.frombuffer(COLORS.encode(), dtype=np.uint8)
+# Snapshot header: magic, format version and cube size, followed by one byte per sticker
+_SNAPSHOT = struct.Struct("<4sII")
+_SNAPSHOT_MAGIC = b"RBKS"
+_SNAPSHOT_VERSION = 1
+
+# Move notation. parse_moves() reads WCA notation into a list of
+# (axis, first, last, quarters) moves: layers first..last of one axis, counted
+# as in RubiksCube.turn, turned together by `quarters` quarter turns in turn()'s
+# positive direction. Single layers are moves with first == last.
+
+# Axis of each face letter, whether its layers count from the far end of the
+# axis, and the quarter turns in turn()'s direction that make its clockwise turn
+_FACE_TURNS = {
+    'R': ('x', True, 1), 'L': ('x', False, 3), 'U': ('y', False, 1), 'D': ('y', True, 3),
+    'F': ('z', False, 1), 'B': ('z', True, 3),
+}
+# The near and far face of each axis, and their planes in the sticker array
+_AXIS_FACES = {'x': ('L', 'R'), 'y': ('U', 'D'), 'z': ('F', 'B')}
+_AXIS_PLANES = {axis: (FACES.index(near), FACES.index(far)) for axis, (near, far) in _AXIS_FACES.items()}
+# Slices of the first inner layer: M turns like L, E like D and S like F, S counted from B
+_SLICE_TURNS = {'M': ('x', False, 3), 'E': ('y', False, 3), 'S': ('z', True, 1)}
+_SUFFIX_TURNS = {"": 1, "2": 2, "2'": 2, "'": 3}
+_TURN_SUFFIXES = {1: "", 2: "2", 3: "'"}
+_MOVE_TOKEN = re.compile(r"(\d+)?([UDLRFB]w?|[udlrfbxyzMES])(2'?|'|)")
+
+def parse_moves(size, text):
+    """
+        Parse move notation for a cube of the given size into moves.
+
+        R, L, U, D, F and B turn a face. A number in front turns only that
+        layer, so 3R is the third layer from R. A trailing w makes a wide turn
+        of the outer two layers, or of as many as the number says (3Rw), and
+        r, l, u, d, f, b are two-layer wide turns too. M, E and S turn the
+        first inner layer, M like L, E like D and S like F. x, y and z turn
+        the whole cube like R, U and F. Any move may end in ' for
+        anticlockwise or 2 (or 2') for a half turn. Spaces between moves are
+        optional, and text may also be a list of tokens.
+    """
+    if not isinstance(text, str):
+        text = " ".join(text)
+    last = size - 1
+    moves = []
+    pos = 0
+    while pos < len(text):
+        if text[pos].isspace():
+            pos += 1
+            continue
+        match = _MOVE_TOKEN.match(text, pos)
+        if match is None:
+            raise ValueError(f"Unknown move at {text[pos:]!r}.")
+        pos = match.end()
+        count, name, suffix = match.groups()
+        quarters = _SUFFIX_TURNS[suffix]
+
+        if name in "xyz" and not count:
+            moves.append((name, 0, last, quarters))
+            continue
+        if name in _SLICE_TURNS and not count:
+            if last < 2:
+                raise ValueError("Layer must be greater than 0 and less than or equal to the size of the cube.")
+            axis, from_far, turn = _SLICE_TURNS[name]
+            layer = last - 1 if from_far else 1
+            moves.append((axis, layer, layer, turn * quarters % 4))
+            continue
+        if name in "xyzMES":
+            raise ValueError(f"Move {match.group()!r} takes no layer number.")
+
+        axis, from_far, turn = _FACE_TURNS[name[0].upper()]
+        wide = name.endswith('w') or name.islower()
+        depth = int(count) if count else 2 if wide else 1
+        if not 1 <= depth <= size:
+            raise ValueError(f"Move {match.group()!r} needs a cube of at least {depth} layers, not {size}.")
+        first, stop = (0, depth - 1) if wide else (depth - 1, depth - 1)
+        if from_far:
+            first, stop = last - stop, last - first
+        moves.append((axis, first, stop, turn * quarters % 4))
+    return moves
+
+def simplify_moves(moves):
+    """
+        Shorten a list of moves without changing what it does.
+
+        Moves on one axis commute, so each run of them is summed into quarter
+        turns per layer: U U' cancels, U U becomes U2 and U D U' becomes D.
+        When a run cancels out, the runs on either side may share an axis and
+        merge too, so R U U' R' comes to nothing. Each run is then written
+        out by layer, with neighbouring layers that turn the same way joined
+        into one wide move.
+    """
+    runs = []
+    for axis, first, last, quarters in moves:
+        if quarters % 4 == 0:
+            continue
+        if not runs or runs[-1][0] != axis:
+            runs.append((axis, {}))
+        turns = runs[-1][1]
+        for layer in range(first, last + 1):
+            total = (turns.get(layer, 0) + quarters) % 4
+            if total:
+                turns[layer] = total
+            else:
+                del turns[layer]
+        if not turns:
+            runs.pop()
+
+    simplified = []
+    for axis, turns in runs:
+        layers = sorted(turns)
+        start = layers[0]
+        for i, layer in enumerate(layers):
+            following = layers[i + 1] if i + 1 < len(layers) else None
+            if following != layer + 1 or turns[following] != turns[layer]:
+                simplified.append((axis, start, layer, turns[layer]))
+                start = following
+    return simplified
+
+def format_moves(size, moves):
+    """Write moves in the notation parse_moves() reads, preferring outer faces and wide turns."""
+    last = size - 1
+    tokens = []
+    for axis, first, stop, quarters in moves:
+        if first == 0 and stop == last:
+            tokens.append(axis + _TURN_SUFFIXES[quarters])
+            continue
+        near, far = _AXIS_FACES[axis]
+        if first == 0 or stop == last:
+            # A block of layers on the outside is a face or wide turn
+            face, depth = (near, stop + 1) if first == 0 else (far, last - first + 1)
+            name = face if depth == 1 else face + "w" if depth == 2 else f"{depth}{face}w"
+            tokens.append(name + _TURN_SUFFIXES[quarters * _FACE_TURNS[face][2] % 4])
+            continue
+        # Inner layers are written one slice at a time, numbered from the nearer face
+        for layer in range(first, stop + 1):
+            if size == 3:
+                name = {'x': 'M', 'y': 'E', 'z': 'S'}[axis]
+                tokens.append(name + _TURN_SUFFIXES[quarters * _SLICE_TURNS[name][2] % 4])
+            else:
+                face, depth = (near, layer + 1) if layer <= last - layer else (far, last - layer + 1)
+                tokens.append(f"{depth}{face}" + _TURN_SUFFIXES[quarters * _FACE_TURNS[face][2] % 4])
+    return " ".join(tokens)
+
+def expand_moves(moves):
+    """The single-layer (axis, layer, quarters) turns that carry out a list of moves."""
+    return [(axis, layer, quarters) for axis, first, last, quarters in moves for layer in range(first, last + 1)]
+
+def move_spec(size, move):
+    """
+        The (axis, layer, quarters) turn of a single-layer move token, such as
+        R, U2, 3F' or M, in the terms of RubiksCube.turn.
+    """
+    moves = parse_moves(size, move)
+    if len(moves) != 1 or moves[0][1] != moves[0][2]:
+        raise ValueError(f"{move!r} is not a single-layer move.")
+    axis, layer, _, quarters = moves[0]
+    return axis, layer, quarters
+
+AXES = "xyz"
+
+def scramble_array(size, count, length, rng, outer_only=False):
+    """
+        `count` random scrambles of `length` turns each, as a (count, length, 3)
+        int16 array of (axis index into AXES, layer, quarters) rows. The whole
+        batch comes from one draw of the numpy Generator `rng`, one number per
+        turn, plus one draw for the starting axes.
+
+        Consecutive turns are always on different axes. Turns on one axis
+        commute, so a run of them could be merged and would make the scramble
+        weaker than its length suggests. Layers are uniform over the whole
+        cube, or only the two outer faces if outer_only (the WCA style for 3x3).
+    """
+    layers = 2 if outer_only else size
+    # Each draw packs an axis step of 1 or 2 (never 0), a quarter count and a layer
+    draws = rng.integers(0, 2 * 3 * layers, size=(count, length), dtype=np.int32)
+    steps = (draws & 1) + 1
+    steps[:, :1] = rng.integers(0, 3, size=(count, 1))
+    draws >>= 1
+    turns = np.empty((count, length, 3), dtype=np.int16)
+    turns[:, :, 0] = np.cumsum(steps, axis=1) % 3
+    turns[:, :, 1] = draws // 3
+    turns[:, :, 2] = draws % 3 + 1
+    if outer_only:
+        turns[:, :, 1] *= size - 1
+    return turns
+
+def _scramble_chunk(args):
+    size, count, length, seed, outer_only = args
+    return scramble_array(size, count, length, np.random.default_rng(seed), outer_only)
+
+def scramble_batch(size, count, length, seed=None, processes=None, chunksize=65536, outer_only=False):
+    """
+        `count` scrambles as one (count, length, 3) array like scramble_array,
+        generated in chunks across worker processes. Every chunk draws from its
+        own child of SeedSequence(seed), so the streams are independent and the
+        result depends on seed and chunksize only, not on the process count.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(max(1, -(-count // chunksize)))
+    chunks = [(size, min(chunksize, count - i * chunksize), length, child, outer_only) for i, child in enumerate(seeds)]
+    if processes == 1 or len(chunks) == 1:
+        parts = [_scramble_chunk(chunk) for chunk in chunks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            parts = pool.map(_scramble_chunk, chunks)
+    return np.concatenate(parts)
+
+class MoveTable:
+    """
+        The moves of one cube size as permutations of the flat 6 * size * size
+        sticker vector: after a move, sticker i holds what sticker perm[i]
+        held before, so a move is the single gather state[perm]. Doing p1 and
+        then p2 is the permutation p1[p2]. Permutations are built the first
+        time they are asked for and kept.
+    """
+    def __init__(self, size):
+        self.size = size
+        stickers = 6 * size * size
+        self.dtype = np.uint16 if stickers <= 1 << 16 else np.int32
+        self.identity = np.arange(stickers, dtype=self.dtype)
+        self.perms = {}
+
+    def permutation(self, axis, layer, quarters=1):
+        """The permutation of RubiksCube.turn(axis, layer, quarters)."""
+        quarters %= 4
+        key = (axis, layer, quarters)
+        perm = self.perms.get(key)
+        if perm is None:
+            if quarters == 0:
+                perm = self.identity
+            elif quarters == 1:
+                # Turn a cube whose stickers are labelled by position to see where each one came from
+                scratch = RubiksCube(self.size)
+                scratch._attach(self.identity.reshape(6, self.size, self.size).copy())
+                scratch.turn(axis, layer, 1)
+                perm = scratch.stickers.reshape(-1)
+            else:
+                perm = self.permutation(axis, layer, quarters - 1)[self.permutation(axis, layer, 1)]
+            self.perms[key] = perm
+        return perm
+
+    def compile(self, sequence):
+        """
+            Compose a sequence of moves into one permutation. The sequence is
+            either notation for parse_moves(), which is simplified first, or a
+            list of notation tokens and (axis, layer, quarters) turns.
+        """
+        if isinstance(sequence, str):
+            turns = expand_moves(simplify_moves(parse_moves(self.size, sequence)))
+        else:
+            turns = [turn for move in sequence
+                     for turn in (expand_moves(parse_moves(self.size, move)) if isinstance(move, str) else [move])]
+        perm = self.identity
+        for turn in turns:
+            perm = perm[self.permutation(*turn)]
+        return perm
+
+@lru_cache(maxsize=None)
+def move_table(size):
+    """The shared MoveTable of a cube size."""
+    return MoveTable(size)
+
+@lru_cache(maxsize=None)
+def _inversion_pairs(n):
+    # Every (i, j) with i < j, as two index arrays
+    return np.triu_indices(n, 1)
+
+def _parity(perms):
+    """The parity of each row of an (M, n) array of permutations, 0 for even and 1 for odd."""
+    first, second = _inversion_pairs(perms.shape[1])
+    return (perms[:, first] > perms[:, second]).sum(axis=1) % 2
+
+class PieceTables:
+    """
+        Where the pieces of a cube size sit in the flat sticker array, so a
+        state can be checked with a few gathers and bincounts instead of a
+        walk over its stickers.
+
+        Every cubie is located in (x, y, z) coordinates, x running from L to
+        R, y from U to D and z from F to B. Cubies with three stickers are
+        corners, read clockwise from their U or D sticker. Cubies with two are
+        the middle edges of odd cubes, read from their U/D or else F/B sticker
+        as in RubiksSolver, and the wings of cubes of 4 and up. A wing is read
+        in an order fixed by which side of its edge's midpoint it sits on, as
+        wings can move between edges but never flip. Wings and centres fall
+        into orbits that no move mixes, and each orbit has to hold the same
+        pieces as when solved.
+
+        On odd cubes the corners and middle edges are recoloured by the fixed
+        centres, which brings a cube turned by slices or whole-cube rotations
+        back to one whose corners and middle edges obey the 3x3 laws: twists sum to a multiple
+        of 3, flips to a multiple of 2, and corners and middle edges are
+        permuted with the same parity.
+    """
+    # Why each check of check() fails
+    ERRORS = {
+        "centers": "The centre pieces do not match a solvable cube.\n",
+        "corners": "The corners are not each a different corner piece.\n",
+        "edges": "The edges are not each a different edge piece.\n",
+        "twist": "The corner twists do not add up to a multiple of 3.\n",
+        "flip": "An odd number of edges is flipped.\n",
+        "parity": "The corner and edge permutations differ in parity.\n",
+    }
+    # Outward normal of each face, in FACES order
+    NORMALS = np.array([(0, -1, 0), (0, 1, 0), (-1, 0, 0), (1, 0, 0), (0, 0, -1), (0, 0, 1)])
+
+    def __init__(self, size):
+        self.size = size
+        last = size - 1
+        area = size * size
+        solved = np.repeat(np.arange(len(COLORS), dtype=np.uint8), area)
+
+        # Border stickers grouped by cubie; O(size) of them, so a Python loop is fine
+        cubies = {}
+        for face in range(6):
+            for row in range(size):
+                for col in (range(size) if row in (0, last) else (0, last)):
+                    x, y, z = [(col, 0, last - row), (col, last, row), (0, row, last - col),
+                               (last, row, col), (col, row, 0), (last - col, row, last)][face]
+                    cubies.setdefault((x, y, z), []).append((face, face * area + row * size + col))
+
+        corners, edges, wings, wing_orbits = [], [], [], []
+        for position, stickers in cubies.items():
+            faces = [face for face, _ in stickers]
+            if len(stickers) == 3:
+                first = min(range(3), key=lambda i: faces[i])
+                a, b, c = stickers[first:] + stickers[:first]
+                # Clockwise from outside the corner, as CORNER_FACELETS in RubiksSolver
+                if np.linalg.det(self.NORMALS[[a[0], b[0], c[0]]]) > 0:
+                    b, c = c, b
+                corners.append([a[1], b[1], c[1]])
+            elif len(stickers) == 2:
+                axis = next(i for i in range(3) if 0 < position[i] < last)
+                offset = 2 * position[axis] - last
+                if offset == 0:
+                    # U/D sticker first, then F/B
+                    edges.append([index for _, index in sorted(stickers, key=lambda s: (0, 0, 2, 2, 1, 1)[s[0]])])
+                    continue
+                a, b = stickers
+                if offset * np.cross(self.NORMALS[a[0]], self.NORMALS[b[0]])[axis] < 0:
+                    a, b = b, a
+                wings.append([a[1], b[1]])
+                wing_orbits.append(min(position[axis], last - position[axis]) - 1)
+
+        self.corners = np.array(corners, dtype=np.intp).reshape(-1, 3)
+        self.edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+        self.wings = np.array(wings, dtype=np.intp).reshape(-1, 2)
+        self.wing_codes = np.array(wing_orbits, dtype=np.intp) * 36
+        self.wing_home = self._bincount(self.wing_codes + solved[self.wings] @ [6, 1], 36 * max(0, (size - 2) // 2))
+
+        # Corner and middle edge pieces by the colours read off them, coded
+        # 36 * first + 6 * second + third colour for corners and
+        # 6 * first + second colour for edges, with each corner's twist
+        codes = solved[self.corners] @ [36, 6, 1]
+        self.corner_ids = np.full(216, -1, dtype=np.intp)
+        self.corner_twists = np.zeros(216, dtype=np.intp)
+        for twist in range(3):
+            turned = solved[np.roll(self.corners, twist, axis=1)] @ [36, 6, 1]
+            self.corner_ids[turned] = np.arange(len(codes))
+            self.corner_twists[turned] = twist
+        codes = solved[self.edges] @ [6, 1]
+        self.edge_ids = np.full(36, -1, dtype=np.intp)
+        self.edge_flips = np.zeros(36, dtype=np.intp)
+        self.edge_ids[codes] = np.arange(len(codes))
+        reversed_codes = solved[self.edges[:, ::-1]] @ [6, 1]
+        self.edge_ids[reversed_codes] = np.arange(len(codes))
+        self.edge_flips[reversed_codes] = 1
+
+        # Centres: the fixed centres of odd cubes, then the rest in orbits of 24 named by
+        # the least flat position each one reaches by turning its face
+        self.fixed = None
+        if size % 2:
+            self.fixed = np.arange(6) * area + (last // 2) * (size + 1)
+            rotations = {}
+            turner = RubiksCube(1)
+            frontier = [turner]
+            while frontier:
+                cube = frontier.pop()
+                key = cube.stickers.tobytes()
+                if key not in rotations:
+                    rotations[key] = cube.stickers.reshape(-1).copy()
+                    for axis in 'xy':
+                        frontier.append(cube.copy())
+                        frontier[-1].turn(axis, 0, 1)
+            self.rotations = np.array(list(rotations.values()))
+        rows, cols = np.mgrid[1:max(1, last), 1:max(1, last)].reshape(2, -1)
+        keys = np.minimum.reduce([rows * size + cols, cols * size + last - rows,
+                                  (last - rows) * size + last - cols, (last - cols) * size + rows])
+        inner = keys != (last // 2) * (size + 1) if size % 2 else slice(None)
+        orbit_keys, orbits = np.unique(keys[inner], return_inverse=True)
+        self.centers = (np.arange(6)[:, None] * area + (rows * size + cols)[inner]).reshape(-1).astype(np.int32)
+        self.center_codes = np.tile(orbits.astype(np.int32) * 6, 6)
+        self.center_home = self._bincount(self.center_codes + solved[self.centers], 6 * len(orbit_keys))
+
+    @staticmethod
+    def _bincount(codes, length):
+        # Per-row counts of an (n,) or (M, n) array of codes below `length`
+        codes = np.atleast_2d(codes)
+        rows = np.arange(len(codes), dtype=np.intp)[:, None] * length
+        return np.bincount((codes + rows).ravel(), minlength=len(codes) * length).reshape(len(codes), length)
+
+    def check(self, states):
+        """
+            Check an (M, 6 * size * size) array of states. Returns a dict of
+            boolean arrays, one per check, of the cubes that pass: "colors"
+            (size * size stickers of each colour) and the checks in ERRORS.
+        """
+        states = np.asarray(states)
+        count = len(states)
+        checks = {"colors": (self._bincount(states, len(COLORS)) == self.size * self.size).all(axis=1)}
+
+        checks["centers"] = np.ones(count, dtype=bool)
+        if len(self.centers):
+            counts = self._bincount(self.center_codes + states[:, self.centers], self.center_home.shape[1])
+            checks["centers"] &= (counts == self.center_home).all(axis=1)
+        checks["edges"] = np.ones(count, dtype=bool)
+        if len(self.wings):
+            counts = self._bincount(self.wing_codes + states[:, self.wings] @ [6, 1], self.wing_home.shape[1])
+            checks["edges"] &= (counts == self.wing_home).all(axis=1)
+
+        corners = states[:, self.corners] @ [36, 6, 1]
+        edges = states[:, self.edges] @ [6, 1]
+        if self.fixed is not None:
+            centers = states[:, self.fixed].astype(np.intp)
+            checks["centers"] &= (centers[:, None, :] == self.rotations).all(axis=2).any(axis=1)
+            # Recolour each cube's corners and edges as if its fixed centres showed their faces' home colours
+            rows = np.arange(count)[:, None]
+            recolour = np.zeros((count, len(COLORS)), dtype=np.intp)
+            recolour[rows, centers] = np.arange(len(COLORS))
+            corners = recolour[rows[:, :, None], states[:, self.corners]] @ [36, 6, 1]
+            edges = recolour[rows[:, :, None], states[:, self.edges]] @ [6, 1]
+
+        corner_ids = self.corner_ids[corners]
+        checks["corners"] = (np.sort(corner_ids, axis=1) == np.arange(len(self.corners))).all(axis=1)
+        checks["twist"] = self.corner_twists[corners].sum(axis=1) % 3 == 0
+
+        if len(self.edges):
+            edge_ids = self.edge_ids[edges]
+            checks["edges"] &= (np.sort(edge_ids, axis=1) == np.arange(len(self.edges))).all(axis=1)
+            checks["flip"] = self.edge_flips[edges].sum(axis=1) % 2 == 0
+            checks["parity"] = _parity(corner_ids) == _parity(edge_ids)
+        return checks
+
+@lru_cache(maxsize=None)
+def piece_tables(size):
+    """The shared PieceTables of a cube size."""
+    return PieceTables(size)
+
+class RowView:
+    """
+        One row of a face, read and written as colour letters but stored as
+        colour codes in the cube's sticker array.
+    """
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [COLORS[code] for code in self.codes[index]]
+        return COLORS[self.codes[index]]
+
+    def __setitem__(self, index, colors):
+        self.codes[index] = COLOR_CODES[colors] if isinstance(colors, str) else [COLOR_CODES[c] for c in colors]
+
+    def __iter__(self):
+        return (COLORS[code] for code in self.codes.tolist())
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+class FaceView:
+    """
+        One face of the cube as the old list of rows of colour letters:
+        face[row][col] reads and writes a single sticker. It is a view, so
+        writes land in the cube and later moves show up in it.
+    """
+    def __init__(self, codes):
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return RowView(self.codes[row])
+
+    def __setitem__(self, row, colors):
+        self.codes[row] = [COLOR_CODES[c] for c in colors]
+
+    def __iter__(self):
+        return (RowView(row) for row in self.codes)
+
+    def __eq__(self, other):
+        return self.tolist() == [list(row) for row in other]
+
+    def tolist(self):
+        return [[COLORS[code] for code in row] for row in self.codes.tolist()]
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+class FaceMap(Mapping):
+    """
+        The faces of a cube by letter. Each lookup gives a FaceView of the
+        face as it is now, and assigning a face, as in
+        cube.faces['F'] = cube.rotate_face(cube.faces['F']), writes its
+        colour letters into the cube.
+    """
+    def __init__(self, cube):
+        self.cube = cube
+
+    def __getitem__(self, name):
+        return self.cube._face_view(name)
+
+    def __setitem__(self, name, colors):
+        self.cube._set_face(name, colors)
+
+    def __len__(self):
+        return len(FACES)
+
+    def __iter__(self):
+        return iter(FACES)
+
+    def __repr__(self):
+        return repr({name: self[name] for name in FACES})
 
 class RubiksCube:
     def __init__(self, size):
@@ -19,185 +568,456 @@ class RubiksCube:
          *        +-------+
          
          Initialize the Rubik's Cube with the given size.
+
+         All stickers live in one contiguous (6, size, size) uint8 array, one
+         face per plane in FACES order, holding indices into COLORS. Each
+         face is stored as seen from outside the cube, laid out as in the
+         net above: U has B at its top edge, D has F at its top edge, and
+         L, F, R, B have U at their top edge. Turning an outer layer only
+         records the new orientation of its face, which is applied when the
+         face is read, so every turn moves O(size) stickers.
          
         """
         self.size = size
-        self.faces = { 
-            'U': [['W'] * size for _ in range(size)],  # Up (White) 
-            'D': [['Y'] * size for _ in range(size)],  # Down (Yellow) 
-            'L': [['G'] * size for _ in range(size)],  # Left (Green) 
-            'R': [['B'] * size for _ in range(size)],  # Right (Blue) 
-            'F': [['R'] * size for _ in range(size)],  # Front (Red) 
-            'B': [['O'] * size for _ in range(size)],  # Back (Orange) 
-        } 
-        
+        self._attach(np.repeat(np.arange(6, dtype=np.uint8), size * size).reshape(6, size, size))
+
+    def _attach(self, stickers):
+        """
+            Take a (6, size, size) array as the sticker array, with every face
+            in its own orientation. Turning a face does not move its stickers:
+            _orient records how many clockwise quarters each stored face is
+            behind, and _oriented holds the four views of each plane that read
+            it rotated by 0 to 3 quarters, so the face costs nothing to turn.
+        """
+        self._stickers = stickers
+        self._orient = [0] * 6
+        self._oriented = [(plane, plane[::-1].T, plane[::-1, ::-1], plane.T[::-1]) for plane in stickers]
+        # How many cubes hold the array, in a list shared between them. A
+        # read-only array, such as a snapshot in a bytes object, counts its
+        # buffer as one more owner, so it is copied on the first change.
+        self._owners = [1 if stickers.flags.writeable else 2]
+
+    # Transactions: the moves made since the first open push(), and where in
+    # them each open push() started. Both are None outside transactions.
+    _journal = None
+    _marks = None
+    _owners = None
+
+    @property
+    def _shared(self):
+        # True while a fork, or a read-only buffer, also holds the sticker array
+        return self._owners[0] > 1
+
+    def _unshare(self):
+        # Copy a sticker array shared with a fork before changing it, and give up this cube's share of it
+        orient = self._orient
+        self._owners[0] -= 1
+        self._attach(self._stickers.copy())
+        self._orient = orient
+
+    def __del__(self):
+        # A fork that is dropped unchanged gives up its share, so the others need not copy
+        if self._owners is not None:
+            self._owners[0] -= 1
+
+    @property
+    def stickers(self):
+        """
+            The (6, size, size) sticker array, one face per plane in FACES
+            order holding indices into COLORS, with every face brought into
+            its own orientation first.
+        """
+        if self._shared and any(self._orient):
+            self._unshare()
+        for index, quarters in enumerate(self._orient):
+            if quarters:
+                # numpy copies overlapping operands, so a plane can be assigned a rotated view of itself
+                self._stickers[index] = self._oriented[index][quarters]
+                self._orient[index] = 0
+        return self._stickers
+
+    @property
+    def faces(self):
+        """
+            The faces by letter, as views of the sticker array that read and
+            write colour letters. A view follows its face's orientation when
+            it was looked up, so look it up again after turning the cube. As
+            they can be written to, a fork gets its own sticker array first.
+            Assigning to a face, or to the whole property, sets its colours.
+        """
+        return FaceMap(self)
+
+    @faces.setter
+    def faces(self, faces):
+        codes = [self._face_codes(faces[name]) for name in FACES]
+        if self._journal is not None:
+            # No move leads back from arbitrary faces, so keep the whole state
+            self._journal.append(self.stickers.copy())
+        if self._shared:
+            self._unshare()
+        self._orient = [0] * 6
+        self._stickers[...] = codes
+
+    def _face_view(self, name):
+        index = FACE_INDEX[name]
+        if self._shared:
+            self._unshare()
+        return FaceView(self._oriented[index][self._orient[index]])
+
+    def _face_codes(self, colors):
+        # The colour codes of a face given as rows of colour letters, read before anything is written
+        codes = np.array([[COLOR_CODES[color] for color in row] for row in colors], dtype=np.uint8)
+        if codes.shape != (self.size, self.size):
+            raise ValueError(f"A face must be {self.size} rows of {self.size} colours.")
+        return codes
+
+    def _set_face(self, name, colors):
+        # Set one face, journaled like the faces setter
+        index = FACE_INDEX[name]
+        codes = self._face_codes(colors)
+        if self._journal is not None:
+            self._journal.append(self.stickers.copy())
+        if self._shared:
+            self._unshare()
+        self._orient[index] = 0
+        self._stickers[index] = codes
+
+    def copy(self):
+        """An independent cube in the same state."""
+        cube = RubiksCube(self.size)
+        cube._stickers[...] = self._stickers
+        cube._orient = list(self._orient)
+        return cube
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __getstate__(self):
+        # The views in _oriented would be pickled as arrays of their own, so
+        # keep only the stickers and build the views again when loading
+        return {"size": self.size, "stickers": self.stickers}
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self._attach(np.array(state["stickers"], dtype=np.uint8))
+
+    def fork(self):
+        """
+            A copy-on-write copy of the cube. The two share one sticker array
+            until either of them changes, and only that one then copies it,
+            so a fork costs O(1) to take however big the cube is. Once the
+            others have copied or been dropped, the last holder changes the
+            array in place. The fork starts with no open transactions.
+        """
+        cube = RubiksCube.__new__(RubiksCube)
+        cube.size = self.size
+        cube._stickers, cube._oriented = self._stickers, self._oriented
+        cube._orient = list(self._orient)
+        cube._owners = self._owners
+        self._owners[0] += 1
+        return cube
+
+    def push(self):
+        """
+            Open a transaction. Every move from here on is journaled with what
+            it takes to undo it, until pop() undoes them all or commit() keeps
+            them. Transactions nest, so a depth-first search can push() before
+            each move and pop() after it instead of copying the cube.
+        """
+        if self._journal is None:
+            self._journal, self._marks = [], []
+        self._marks.append(len(self._journal))
+
+    def pop(self):
+        """Undo every move of the innermost transaction and close it. Returns how many moves were undone."""
+        if not self._marks:
+            raise ValueError("pop() without a matching push().")
+        count = len(self._journal) - self._marks[-1]
+        self.undo(count)
+        self.commit()
+        return count
+
+    def commit(self):
+        """Close the innermost transaction and keep its moves, which an enclosing transaction can still undo."""
+        if not self._marks:
+            raise ValueError("commit() without a matching push().")
+        self._marks.pop()
+        if not self._marks:
+            self._journal = self._marks = None
+
+    def undo(self, count=1):
+        """Undo the last `count` moves, which must all belong to the innermost transaction."""
+        journal = self._journal
+        if not self._marks or not 0 <= count <= len(journal) - self._marks[-1]:
+            raise ValueError("Can only undo moves made since the last push().")
+        # The moves that undo a move are not journaled themselves
+        self._journal = None
+        try:
+            for _ in range(count):
+                move = journal.pop()
+                if isinstance(move, tuple):
+                    axis, layer, quarters = move
+                    self.turn(axis, layer, -quarters)
+                elif move.ndim == 1:
+                    # A permutation from apply(): put every sticker back where it came from
+                    self.apply(np.argsort(move))
+                else:
+                    # The state from before the faces were set
+                    if self._shared:
+                        self._unshare()
+                    self._orient = [0] * 6
+                    self._stickers[...] = move
+        finally:
+            self._journal = journal
+
+    def to_bytes(self):
+        """
+            The state packed three bits per sticker, in sticker array order:
+            ceil(18 * size * size / 8) bytes, 21 for a 3x3 cube.
+        """
+        bits = (self.stickers.reshape(-1, 1) // _CODE_BITS) & 1
+        return np.packbits(bits).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, size):
+        """A cube of the given size in the state packed by to_bytes()."""
+        count = 6 * size * size
+        if len(data) != (3 * count + 7) // 8:
+            raise ValueError(f"Expected {(3 * count + 7) // 8} bytes for a cube of size {size}, got {len(data)}.")
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=3 * count).reshape(count, 3)
+        codes = bits @ _CODE_BITS
+        if codes.max() >= len(COLORS):
+            raise ValueError("Not a packed cube state.")
+        cube = cls(size)
+        cube._stickers.reshape(-1)[:] = codes
+        return cube
+
+    def snapshot(self):
+        """
+            The state as a snapshot: a 12-byte header holding a magic number,
+            the format version and the size, then the sticker array at one
+            byte per sticker. Unlike to_bytes() it is not bit-packed, so
+            from_snapshot() can use the stickers where they lie.
+        """
+        return _SNAPSHOT.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, self.size) + self.stickers.tobytes()
+
+    def save(self, path):
+        """Write snapshot() to a file."""
+        with open(path, "wb") as f:
+            f.write(_SNAPSHOT.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, self.size))
+            f.write(np.ascontiguousarray(self.stickers).data)
+
+    @classmethod
+    def from_snapshot(cls, buffer, offset=0):
+        """
+            The cube in the snapshot at `offset` in a buffer: bytes, a
+            bytearray, a memoryview or an mmap. The sticker array is a view
+            of the buffer rather than a copy, so turning the cube writes into
+            the buffer. A cube over a read-only buffer copies its stickers
+            the first time it changes, like a fork().
+        """
+        view = memoryview(buffer)
+        if view.nbytes - offset < _SNAPSHOT.size:
+            raise ValueError("Not a cube snapshot.")
+        magic, version, size = _SNAPSHOT.unpack_from(view, offset)
+        if magic != _SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION:
+            raise ValueError("Not a cube snapshot.")
+        count = 6 * size * size
+        if view.nbytes - offset - _SNAPSHOT.size < count:
+            raise ValueError(f"Snapshot of a cube of size {size} is cut short.")
+        stickers = np.frombuffer(buffer, dtype=np.uint8, count=count, offset=offset + _SNAPSHOT.size)
+        if count and stickers.max() >= len(COLORS):
+            raise ValueError("Not a cube snapshot.")
+        # Skip __init__, which would allocate a sticker array only to replace it
+        cube = cls.__new__(cls)
+        cube.size = size
+        cube._attach(stickers.reshape(6, size, size))
+        return cube
+
+    @classmethod
+    def load(cls, path):
+        """
+            The cube in a snapshot file written by save(). The file is
+            memory-mapped copy-on-write, so loading reads no more than
+            from_snapshot() checks and turning the cube leaves the file as
+            it was.
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        return cls.from_snapshot(data)
+
+    def __eq__(self, other):
+        if not isinstance(other, RubiksCube):
+            return NotImplemented
+        return self.size == other.size and np.array_equal(self.stickers, other.stickers)
+
+    def __hash__(self):
+        # Hashes the current state, so a cube must not be turned while it is a dict key or set member
+        return hash(self.stickers.tobytes())
 
-            
     def rotate_face(self, face):
         """
             Rotate a given face of the Rubik's Cube 90 degrees clockwise.
         """
-        return [list(row) for row in zip(*face[::-1])]
+        return np.rot90(face, -1).tolist()
     
     def rotate_face_ccw(self, face):
         """
             Rotate a given face of the Rubik's Cube 90 degrees counter clockwise.
         """
-        return [list(row) for row in zip(*face)][::-1]
+        return np.rot90(face, 1).tolist()
+
+    def _layer_strips(self, axis, layer):
+        """
+            The four edge strips that a positive quarter turn of a layer cycles,
+            as views ordered so that each strip takes the next one's stickers
+            and the last takes the first's. Slicing the faces' oriented views
+            costs the same at any size, and the strips are O(size) to move.
+        """
+        views, orient = self._oriented, self._orient
+        last = self.size - 1
+        if axis == 'x':
+            # Column `layer` of U, F, D and the mirrored column of B, which is seen from behind
+            U, F, D, B = views[0][orient[0]], views[4][orient[4]], views[1][orient[1]], views[5][orient[5]]
+            return U[:, layer], F[:, layer], D[:, layer], B[::-1, last - layer]
+        if axis == 'y':
+            # Row `layer` of the four side faces
+            F, R, B, L = views[4][orient[4]], views[3][orient[3]], views[5][orient[5]], views[2][orient[2]]
+            return F[layer], R[layer], B[layer], L[layer]
+        if axis == 'z':
+            # The ring `layer` deep behind F: a row of U and D, a column of L and R
+            U, L, D, R = views[0][orient[0]], views[2][orient[2]], views[1][orient[1]], views[3][orient[3]]
+            return U[last - layer], L[::-1, last - layer], D[layer, ::-1], R[:, layer]
+        raise ValueError("Axis must be 'x', 'y' or 'z'.")
+
+    def turn(self, axis, layer, quarters=1):
+        """
+            Turn one layer of the cube by a number of quarter turns.
+
+            axis 'x' counts layers from L and turns them the way R turns,
+            'y' counts from U and turns the way U turns, and 'z' counts from F
+            and turns the way F turns. So R is ('x', size - 1, 1), L is
+            ('x', 0, 3), D is ('y', size - 1, 3) and B is ('z', size - 1, 3).
+            Outer layers also rotate their face.
+        """
+        if not 0 <= layer < self.size:
+            raise ValueError(f"Layer must be between 0 and {self.size - 1}.")
+        quarters %= 4
+        if quarters == 0:
+            return
+        if self._shared:
+            self._unshare()
+        a, b, c, d = self._layer_strips(axis, layer)
+        if self._journal is not None:
+            self._journal.append((axis, layer, quarters))
+
+        if quarters == 1:
+            top = a.copy()
+            a[...] = b
+            b[...] = c
+            c[...] = d
+            d[...] = top
+        elif quarters == 3:
+            top = d.copy()
+            d[...] = c
+            c[...] = b
+            b[...] = a
+            a[...] = top
+        else:
+            top = a.copy()
+            a[...] = c
+            c[...] = top
+            top = b.copy()
+            b[...] = d
+            d[...] = top
+
+        # Outer layers carry a face, which turns clockwise as seen from its own side.
+        # A positive x turn is clockwise for R but anticlockwise for L, and the
+        # other axes turn their near face clockwise and their far face
+        # anticlockwise. Only the face's orientation changes, in O(1).
+        near, far = _AXIS_PLANES[axis]
+        if layer == 0:
+            self._orient[near] = (self._orient[near] + (-quarters if axis == 'x' else quarters)) % 4
+        if layer == self.size - 1:
+            self._orient[far] = (self._orient[far] + (quarters if axis == 'x' else -quarters)) % 4
+
+    def compile(self, sequence):
+        """
+            Compose a sequence of moves into one permutation for apply(), so a
+            long algorithm can be replayed with a single gather.
+        """
+        return move_table(self.size).compile(sequence)
+
+    def apply(self, moves):
+        """
+            Apply a permutation from compile(), or compile and apply a sequence of moves.
+        """
+        perm = moves if isinstance(moves, np.ndarray) else self.compile(moves)
+        if self._journal is not None:
+            self._journal.append(perm)
+        if self._shared:
+            self._unshare()
+        flat = self.stickers.reshape(-1)
+        flat[:] = flat[perm]
+
+    def instrument(self, profile=None):
+        """
+            Count and time every turn of this cube in a MoveProfile, or stop
+            if profile is None. Every move method goes through turn(), so this
+            wraps turn() on this one cube and leaves the class alone: cubes
+            that are not instrumented run exactly the code they always did.
+            apply() gathers whole permutations and is not counted.
+        """
+        self.__dict__.pop("turn", None)
+        if profile is None:
+            return
+        turn = self.turn
+        clock = time.perf_counter
+
+        def timed_turn(axis, layer, quarters=1):
+            start = clock()
+            turn(axis, layer, quarters)
+            profile.record(self.size, axis, layer, clock() - start)
+
+        self.turn = timed_turn
+
+    def _quarters(self, direction, name):
+        # "X" is a clockwise quarter turn of face X, "X'" an anticlockwise one
+        if direction == name:
+            return 1
+        if direction == name + "'":
+            return 3
+        raise ValueError(f"Direction must be {name!r} or {name + chr(39)!r}.")
 
     def rotate_front(self, direction): 
         """
             Rotate the front face CW/CCW and update the adjacent faces accordingly.
         """ 
-        
-        # Rotate the front face 
-        self.faces['F'] = self.rotate_face(self.faces['F']) if direction == "F" else self.rotate_face_ccw(self.faces['F'])
-        
-        # Get the adjacent edges 
-        top_row = self.faces['U'][self.size - 1][:]
-        left_col = [self.faces['L'][i][self.size - 1] for i in range(self.size)]
-        bottom_row = self.faces['D'][0][:]
-        right_col = [self.faces['R'][i][0] for i in range(self.size)]
-        
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'F':
-            for i in range(self.size):
-                self.faces['U'][self.size - 1][i] = left_col[self.size - 1 - i]
-                self.faces['L'][i][self.size - 1] = bottom_row[i]
-                self.faces['D'][0][i] = right_col[self.size - 1 - i]
-                self.faces['R'][i][0] = top_row[i]
-        elif direction == 'F\'':   
-            for i in range(self.size):
-                self.faces['U'][self.size - 1][i] = right_col[i]
-                self.faces['L'][i][self.size - 1] = top_row[self.size - 1 - i]
-                self.faces['D'][0][i] = left_col[i]
-                self.faces['R'][i][0] = bottom_row[self.size - 1 - i]
+        self.turn('z', 0, self._quarters(direction, 'F'))
             
     def rotate_back(self, direction):
         """
             Rotate the back face CW/CCW and update the adjacent faces accordingly.
         """ 
-        # Rotate the back face 
-        self.faces['B'] = self.rotate_face(self.faces['B']) if direction == "B" else self.rotate_face_ccw(self.faces['B'])
-        
-        # Get the adjacent edges 
-        top_row = self.faces['U'][0][:]
-        left_col = [self.faces['L'][i][0] for i in range(self.size)]
-        bottom_row = self.faces['D'][self.size - 1][:]
-        right_col = [self.faces['R'][i][self.size - 1] for i in range(self.size)]
-        
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'B':
-            for i in range(self.size):
-                self.faces['U'][0][i] = right_col[i]
-                self.faces['L'][i][0] = top_row[self.size - 1 - i]
-                self.faces['D'][self.size - 1][i] = left_col[i]
-                self.faces['R'][i][self.size - 1] = bottom_row[self.size - 1 - i]
-        elif direction == 'B\'':
-            for i in range(self.size):
-                self.faces['U'][0][i] = left_col[self.size - 1 - i]
-                self.faces['L'][i][0] = bottom_row[i]
-                self.faces['D'][self.size - 1][i] = right_col[self.size - 1 - i]
-                self.faces['R'][i][self.size - 1] = top_row[i]
+        self.turn('z', self.size - 1, -self._quarters(direction, 'B'))
     
     def rotate_up(self, direction):
         """
             Rotate the up face and the adjacent faces accordingly.
         """ 
-        # Rotate the up face 
-        self.faces['U'] = self.rotate_face(self.faces['U']) if direction == "U" else self.rotate_face_ccw(self.faces['U'])
-        
-        # Get the adjacent faces
-        front_row = self.faces['F'][0][:]
-        left_row = self.faces['L'][0][:]
-        back_row = self.faces['B'][0][:]
-        right_row = self.faces['R'][0][:]
-        
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'U':
-            self.faces['F'][0] = right_row
-            self.faces['L'][0] = front_row
-            self.faces['B'][0] = left_row
-            self.faces['R'][0] = back_row
-        elif direction == 'U\'':
-            self.faces['F'][0] = left_row
-            self.faces['L'][0] = back_row
-            self.faces['B'][0] = right_row
-            self.faces['R'][0] = front_row
+        self.turn('y', 0, self._quarters(direction, 'U'))
 
     def rotate_down(self, direction):
         """Rotate the down face and the adjacent faces accordingly.""" 
-        
-        # Rotate the down face 
-        self.faces['D'] = self.rotate_face(self.faces['D']) if direction == "D" else self.rotate_face_ccw(self.faces['D'])
-        
-        # Get the adjacent faces
-        front_row = self.faces['F'][self.size - 1][:]
-        left_row = self.faces['L'][self.size - 1][:]
-        back_row = self.faces['B'][self.size - 1][:]
-        right_row = self.faces['R'][self.size - 1][:]
-        
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'D':
-            self.faces['F'][self.size - 1] = left_row
-            self.faces['L'][self.size - 1] = back_row
-            self.faces['B'][self.size - 1] = right_row
-            self.faces['R'][self.size - 1] = front_row
-        elif direction == 'D\'':
-            self.faces['F'][self.size - 1] = right_row
-            self.faces['L'][self.size - 1] = front_row
-            self.faces['B'][self.size - 1] = left_row
-            self.faces['R'][self.size - 1] = back_row
+        self.turn('y', self.size - 1, -self._quarters(direction, 'D'))
 
     def rotate_left(self, direction):
         """Rotate the left face and the adjacent faces accordingly.""" 
-        # Rotate the left face 
-        self.faces['L'] = self.rotate_face(self.faces['L']) if direction == "L" else self.rotate_face_ccw(self.faces['L'])
-        
-        # Get the adjacent edges 
-        top_col = [self.faces['U'][i][0] for i in range(self.size)]
-        front_col = [self.faces['F'][i][0] for i in range(self.size)]
-        bottom_col = [self.faces['D'][i][0] for i in range(self.size)]
-        back_col = [self.faces['B'][i][self.size - 1] for i in range(self.size)]
-            
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'L':
-            for i in range(self.size):
-                self.faces['U'][i][0] = back_col[self.size - 1 - i]
-                self.faces['F'][i][0] = top_col[i]
-                self.faces['D'][i][0] = front_col[i]
-                self.faces['B'][i][self.size - 1] = bottom_col[self.size - 1 - i]
-        elif direction == 'L\'':
-            for i in range(self.size):
-                self.faces['U'][i][0] = front_col[i]
-                self.faces['F'][i][0] = bottom_col[i]
-                self.faces['D'][i][0] = back_col[self.size - 1 - i]
-                self.faces['B'][i][self.size - 1] = top_col[self.size - 1 - i]
+        self.turn('x', 0, -self._quarters(direction, 'L'))
 
     def rotate_right(self, direction):
         """Rotate the right face and the adjacent faces accordingly."""
-        # Rotate the right face 
-        self.faces['R'] = self.rotate_face(self.faces['R']) if direction == "R" else self.rotate_face_ccw(self.faces['R'])
-        
-        # Get the adjacent edges 
-        top_col = [self.faces['U'][i][self.size - 1] for i in range(self.size)]
-        front_col = [self.faces['F'][i][self.size - 1] for i in range(self.size)]
-        bottom_col = [self.faces['D'][i][self.size - 1] for i in range(self.size)]
-        back_col = [self.faces['B'][i][0] for i in range(self.size)]
-        
-        # Update the adjacent faces based on the direction of the rotation
-        if direction == 'R':
-            for i in range(self.size):
-                self.faces['U'][i][self.size - 1] = front_col[i]
-                self.faces['F'][i][self.size - 1] = bottom_col[i]
-                self.faces['D'][i][self.size - 1] = back_col[self.size - 1 - i]
-                self.faces['B'][i][0] = top_col[self.size - 1 - i]
-        elif direction == 'R\'':
-            for i in range(self.size):
-                self.faces['U'][i][self.size - 1] = back_col[self.size - 1 - i]
-                self.faces['F'][i][self.size - 1] = top_col[i]
-                self.faces['D'][i][self.size - 1] = front_col[i]
-                self.faces['B'][i][0] = bottom_col[self.size - 1 - i]
+        self.turn('x', self.size - 1, self._quarters(direction, 'R'))
 
     def rotate_middle(self, layer, axis, direction):
         """Rotate the middle slice and the adjacent faces accordingly."""
@@ -217,227 +1037,455 @@ class RubiksCube:
             self.rotate_layer(layer, 2, direction == "CW")
         
     def rotate_layer(self, layer, axis, clockwise):
+        """
+            Turn layer `layer` of an axis a quarter turn. Clockwise follows L on
+            the x-axis (layers counted from L), D on the y-axis (counted from U)
+            and F on the z-axis (counted from B).
+        """
         if axis == 0:  # x-axis
-            # X Orientation, we need the columns
-            front_face = [self.faces['F'][i][layer] for i in range(self.size)]
-            back_face = [self.faces['B'][i][layer] for i in range(self.size)]
-            up_face = [self.faces['U'][i][layer] for i in range(self.size)]
-            down_face = [self.faces['D'][i][layer] for i in range(self.size)]
-            
-            # Update the faces based on the direction of the rotation
-            if clockwise:
-                # Clockwise rotation, back face and downward face are reversed because of the orientation
-                for i in range(self.size):
-                    self.faces['U'][i][layer] = back_face[self.size - 1 - i]
-                    self.faces['B'][i][layer] = down_face[self.size - 1 - i]
-                    self.faces['D'][i][layer] = front_face[i]
-                    self.faces['F'][i][layer] = up_face[i]
-            else:
-                # Counter clockwise rotation, back face and upper face are reversed because of the orientation
-                for i in range(self.size):
-                    self.faces['U'][i][layer] = front_face[i]
-                    self.faces['F'][i][layer] = down_face[i]
-                    self.faces['D'][i][layer] = back_face[self.size - 1 - i]
-                    self.faces['B'][i][layer] = up_face[self.size - 1 - i]
+            self.turn('x', layer, 3 if clockwise else 1)
         elif axis == 1:  # y-axis
-            # Row wise rotation retrieve necessary faces
-            left_face = [self.faces['L'][layer][i] for i in range(self.size)]
-            right_face = [self.faces['R'][layer][i] for i in range(self.size)]
-            front_face = [self.faces['F'][layer][i] for i in range(self.size)]
-            back_face = [self.faces['B'][layer][i] for i in range(self.size)]
-            
-            # Update the faces based on the direction of the rotation
-            if clockwise:
-                # Clockwise rotation, swap the colomns of the faces
-                for i in range(self.size):
-                    self.faces['L'][layer][i] = back_face[i]
-                    self.faces['B'][layer][i] = right_face[i]
-                    self.faces['R'][layer][i] = front_face[i]
-                    self.faces['F'][layer][i] = left_face[i]
-            else:
-                # Counter clockwise rotation, swap the colomns of the faces
-                for i in range(self.size):
-                    self.faces['L'][layer][i] = front_face[i]
-                    self.faces['F'][layer][i] = right_face[i]
-                    self.faces['R'][layer][i] = back_face[i]
-                    self.faces['B'][layer][i] = left_face[i]
+            self.turn('y', layer, 3 if clockwise else 1)
         elif axis == 2:  # z-axis
-            # Column wise rotation
-            right_face = [self.faces['R'][i][layer] for i in range(self.size)]
-            left_face = [self.faces['L'][i][layer] for i in range(self.size)]
-            up_face = [self.faces['U'][layer][i] for i in range(self.size)]
-            down_face = [self.faces['D'][layer][i] for i in range(self.size)]
-            
-            # Update the faces based on the direction of the rotation
-            if clockwise:
-                # Clockwise rotation, swap the rows of the faces and reverse the order
-                for i in range(self.size):
-                    self.faces['U'][layer][i] = left_face[self.size - 1 - i]
-                    self.faces['L'][i][layer] = down_face[i]
-                    self.faces['D'][layer][i] = right_face[self.size - 1 - i]
-                    self.faces['R'][i][layer] = up_face[i]
-            else:
-                # Counter clockwise rotation, swap the rows of the faces and reverse the order
-                for i in range(self.size):
-                    self.faces['U'][layer][i] = right_face[i]
-                    self.faces['R'][i][layer] = down_face[self.size - 1 - i]
-                    self.faces['D'][layer][i] = left_face[i]
-                    self.faces['L'][i][layer] = up_face[self.size - 1 - i]
+            self.turn('z', self.size - 1 - layer, 1 if clockwise else 3)
     
 
-    def scramble(self, num_moves, seed=None):
+    def scramble(self, num_moves, seed=None, render=False, outer_only=False):
         """
         Scramble the Rubik's Cube by making a random sequence of moves.
+
+        The moves come from scramble_array with a local generator seeded by
+        `seed`. They are returned as notation, one token per turn, which
+        moves() and compile() accept, so a scramble can be replayed exactly.
+        Pass render=True to print the map afterwards.
         """
-        np.random.seed(seed)
-        moves = []
-        
-        for _ in range(num_moves):
-            move = np.random.choice(['F', 'B', 'U', 'D', 'L', 'R', 'F\'', 'B\'', 'U\'', 'D\'', 'L\'', 'R\'', 'M', 'M\'', 'E', 'E\'', 'S', 'S\''])
-            if move == 'F' or move == 'F\'':
-                self.rotate_front(move)
-            elif move == 'B' or move == 'B\'':
-                self.rotate_back(move)
-            elif move == 'U' or move == 'U\'':
-                self.rotate_up(move)
-            elif move == 'D' or move == 'D\'':
-                self.rotate_down(move)
-            elif move == 'L' or move == 'L\'':
-                self.rotate_left(move)
-            elif move == 'R' or move == 'R\'':
-                self.rotate_right(move)
-            elif move == 'M' or move == 'M\'': # Middle slice, random layer based on the size of the cube. (Dynamically generated)
-                self.rotate_middle(np.random.randint(1, self.size - 1), 'x', 'cw' if move == 'M' else 'ccw')
-            elif move == 'E' or move == 'E\'':
-                self.rotate_middle(np.random.randint(1, self.size - 1), 'y', 'cw' if move == 'E' else 'ccw')
-            elif move == 'S' or move == 'S\'':
-                self.rotate_middle(np.random.randint(1, self.size - 1), 'z', 'cw' if move == 'S' else 'ccw')
-                
-            moves.append(move)
-        print(self.generate_map())
-        return moves
+        turns = self.scramble_turns(num_moves, seed, outer_only)
+        if render:
+            self.render(sys.stdout)
+            print()
+        return [format_moves(self.size, [(axis, layer, layer, quarters)]) for axis, layer, quarters in turns]
+
+    def scramble_turns(self, num_moves, seed=None, outer_only=False):
+        """Scramble the cube like scramble(), returning the (axis, layer, quarters) turns that turn() takes."""
+        moves = scramble_array(self.size, 1, num_moves, np.random.default_rng(seed), outer_only)[0]
+        turns = [(AXES[axis], layer, quarters) for axis, layer, quarters in moves.tolist()]
+        for turn in turns:
+            self.turn(*turn)
+        return turns
     
     # Helper functions   
     
-    def moves(self, dir):
+    def moves(self, dir, simplify=True):
         """
-            Calls the appropriate rotation function based on the direction.
+            Carry out moves written in the notation of parse_moves(), from a
+            single token such as "R'" to a whole algorithm. The moves are
+            simplified first unless simplify is False. Returns the number of
+            single-layer turns made.
         """
-        
-        if dir == 'F' or dir == 'F\'':
-            self.rotate_front(dir)
-        elif dir == 'B' or dir == 'B\'':
-            self.rotate_back(dir)
-        elif dir == 'U' or dir == 'U\'':
-            self.rotate_up(dir)
-        elif dir == 'D' or dir == 'D\'':
-            self.rotate_down(dir)
-        elif dir == 'L' or dir == 'L\'':
-            self.rotate_left(dir)
-        elif dir == 'R' or dir == 'R\'':
-            self.rotate_right(dir)
-        elif dir == 'M' or dir == 'M\'':
-            self.rotate_middle(1, 'x', 'cw' if dir == 'M' else 'ccw')
-        elif dir == 'E' or dir == 'E\'':
-            self.rotate_middle(1, 'y', 'cw' if dir == 'E' else 'ccw')
-        elif dir == 'S' or dir == 'S\'':
-            self.rotate_middle(1, 'z', 'cw' if dir == 'S' else 'ccw')
+        moves = parse_moves(self.size, dir)
+        if simplify:
+            moves = simplify_moves(moves)
+        turns = expand_moves(moves)
+        for turn in turns:
+            self.turn(*turn)
+        return len(turns)
               
     def isValidCube(self):
-        """Check if the cube is valid. A valid cube should have exactly 9 squares of each color."""
-        color_counts = {
-            'W': 0,  # White
-            'Y': 0,  # Yellow
-            'G': 0,  # Green
-            'B': 0,  # Blue
-            'R': 0,  # Red
-            'O': 0   # Orange
-        }
-
+        """
+            Check if the cube is valid: size * size stickers of each colour,
+            and pieces that the cube's moves can reach, checked through the
+            size's PieceTables. Returns (valid, errors).
+        """
+        stickers = self.stickers.reshape(1, -1)
+        checks = piece_tables(self.size).check(stickers)
         errors = []
-        
-        # Iterate through each face and count the colors
-        for face in self.faces.values():
-            for row in face:
-                for color in row:
-                    if color in color_counts:
-                        color_counts[color] += 1
-        
-        # Check if each color appears exactly 9 times
-        for color, count in color_counts.items():
-            if count != self.size ** 2:
-                errors.append(f"{color} appears {count} times.\n")
-        
-        # Check edges ONLY FOR 3X3 CUBE DEBUGGING PURPOSES
-        if self.size == 3:
-            edges = [
-                ('U', 2, 1, 'F', 0, 1),
-                ('U', 1, 2, 'R', 0, 1),
-                ('U', 0, 1, 'B', 0, 1),
-                ('U', 1, 0, 'L', 0, 1),
-                ('D', 0, 1, 'F', 2, 1),
-                ('D', 1, 2, 'R', 2, 1),
-                ('D', 2, 1, 'B', 2, 1),
-                ('D', 1, 0, 'L', 2, 1),
-                ('F', 1, 2, 'R', 1, 0),
-                ('F', 1, 0, 'L', 1, 2),
-                ('B', 1, 0, 'R', 1, 2),
-                ('B', 1, 2, 'L', 1, 0)
-            ]
-            
-            for edge in edges:
-                face1, row1, col1, face2, row2, col2 = edge
-                if not self.is_valid_edge((self.faces[face1][row1][col1], self.faces[face2][row2][col2])):
-                    errors.append(f"Invalid edge between {face1} face at ({row1}, {col1}): Color: {self.faces[face1][row1][col1]} \
-                                    and {face2} face at ({row2}, {col2}): Color: {self.faces[face2][row2][col2]}\n")
+        if not checks["colors"][0]:
+            counts = np.bincount(stickers[0], minlength=len(COLORS))
+            errors += [f"{color} appears {count} times.\n"
+                       for color, count in zip(COLORS, counts) if count != self.size ** 2]
+        errors += [PieceTables.ERRORS[name] for name, valid in checks.items() if name != "colors" and not valid[0]]
 
         if errors:
             return False, errors
         return True, []
-    
+
     def is_valid_edge(self, edge):
-        """Check if an edge piece is valid."""
-        valid_edges = {
-            ('W', 'R'), ('W', 'B'), ('W', 'O'), ('W', 'G'),
-            ('Y', 'R'), ('Y', 'B'), ('Y', 'O'), ('Y', 'G'),
-            ('R', 'G'), ('R', 'B'),
-            ('O', 'G'), ('O', 'B')
-        }
-        return edge in valid_edges or edge[::-1] in valid_edges
+        """Check if an edge piece is valid: two colours that are neither equal nor opposite."""
+        first, second = edge
+        # Opposite colours share code // 2 (W/Y, G/B, R/O)
+        return (first in COLOR_CODES and second in COLOR_CODES
+                and COLOR_CODES[first] // 2 != COLOR_CODES[second] // 2)
 
-    def generate_map(self):
-        """Generate a map of the current state of the Rubik's Cube."""
+    def _face_text(self, name):
+        # The rows of a face as letters joined by spaces, as a (size, 2 * size - 1) byte array
+        index = FACES.index(name)
+        text = np.full((self.size, 2 * self.size - 1), ord(" "), dtype=np.uint8)
+        text[:, ::2] = _LETTERS[self._oriented[index][self._orient[index]]]
+        return text
+
+    def render(self, stream, chunk=1 << 16):
+        """
+            Write the map of generate_map() to a text stream, such as
+            sys.stdout or an open file. Rows are turned into text a block of
+            about `chunk` characters at a time, so a big cube's map is never
+            held whole in memory.
+        """
         size = self.size
-        map_str = ""
-        offset = self.size + 1 // 2
+        indent = " " * (2 * size)
+        cap = indent + "+-------+\n"
+        border = ("+" + "-" * (2 * size + 1)) * 4 + "+\n"
+
+        def write_rows(*parts):
+            # Parts are strings repeated on every row or (size, width) byte arrays of per-row text
+            width = sum(len(part) if isinstance(part, str) else part.shape[1] for part in parts)
+            step = max(1, chunk // width)
+            for start in range(0, size, step):
+                count = min(step, size - start)
+                block = np.concatenate([np.tile(np.frombuffer(part.encode(), dtype=np.uint8), (count, 1))
+                                        if isinstance(part, str) else part[start:start + count] for part in parts],
+                                       axis=1)
+                stream.write(block.tobytes().decode("ascii"))
 
         # Top face (U)
-        map_str += " " * (size + 1 * offset) + "+-------+\n"
-        map_str += " " * (size + 1 * offset) + "| White |\n"
-        map_str += " " * (size + 1 * offset) + "|   Up  |\n"
-        for row in self.faces['U']:
-            map_str += " " * (size + 1 * offset) + "| " + " ".join(row) + " |\n"
-        map_str += " " * (size + 1 * offset) + "+-------+\n"
-
-        # Middle faces (L, F, R, B)
-        for i in range(size):
-            map_str += "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+\n"
-            map_str += "| " + " ".join(self.faces['L'][i]) + " | " + " ".join(self.faces['F'][i]) + " | " + " ".join(self.faces['R'][i]) + " | " + " ".join(self.faces['B'][i]) + " |\n"
-        map_str += "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+" + "-" * (size * 2 + 1) + "+\n"
+        stream.write(cap + indent + "| White |\n" + indent + "|   Up  |\n")
+        write_rows(indent + "| ", self._face_text('U'), " |\n")
+        stream.write(cap)
+
+        # Middle faces (L, F, R, B), each row under a border
+        write_rows(border + "| ", self._face_text('L'), " | ", self._face_text('F'), " | ",
+                   self._face_text('R'), " | ", self._face_text('B'), " |\n")
+        stream.write(border)
 
         # Bottom face (D)
-        map_str += " " * (size + 1 * offset) + "| Yellow|\n"
-        map_str += " " * (size + 1 * offset) + "|  Down |\n"
-        for row in self.faces['D']:
-            map_str += " " * (size + 1 * offset) + "| " + " ".join(row) + " |\n"
-        map_str += " " * (size + 1 * offset) + "+-------+\n"
+        stream.write(indent + "| Yellow|\n" + indent + "|  Down |\n")
+        write_rows(indent + "| ", self._face_text('D'), " |\n")
+        stream.write(cap)
+
+    def generate_map(self):
+        """Generate a map of the current state of the Rubik's Cube."""
+        text = io.StringIO()
+        self.render(text)
+        return text.getvalue()
+
+class MoveLog:
+    """
+        Append-only log of the turns made on one cube, to persist a long run
+        and replay any point of it. The file at `path` holds a header (magic,
+        format version, cube size and `every`) and then each turn as three
+        int16s, (axis index into AXES, layer, quarters) as scramble_array()
+        makes them. path + ".snapshots" holds a snapshot of the cube from
+        before the first turn and after every `every` turns, so state(i)
+        rebuilds the cube after any number of turns from the nearest
+        snapshot, replaying fewer than `every` of them. Only the live cube is
+        kept in memory.
+
+        Given a cube, a new log starts from the cube's state and turn() turns
+        it. Without one, an existing log is opened to read and append to,
+        and the live cube is rebuilt from it.
+    """
+    HEADER = struct.Struct("<4sIII")
+    MAGIC = b"RBKL"
+    VERSION = 1
+    RECORD = 3 * np.dtype(np.int16).itemsize
+
+    def __init__(self, path, cube=None, every=1000):
+        self.path = path
+        self.snapshot_path = path + ".snapshots"
+        if cube is not None:
+            if every < 1:
+                raise ValueError("every must be at least 1.")
+            self.size, self.every = cube.size, every
+            with open(path, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, self.size, every))
+            open(self.snapshot_path, "wb").close()
+            self.count = self.snapshots = 0
+        else:
+            with open(path, "rb") as f:
+                header = f.read(self.HEADER.size)
+            if len(header) < self.HEADER.size:
+                raise ValueError(f"{path} is not a move log.")
+            magic, version, self.size, self.every = self.HEADER.unpack(header)
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError(f"{path} is not a move log.")
+            # Drop whatever a crash left half written
+            self.count = (os.path.getsize(path) - self.HEADER.size) // self.RECORD
+            os.truncate(path, self.HEADER.size + self.count * self.RECORD)
+            self.snapshots = min(os.path.getsize(self.snapshot_path) // self.snapshot_bytes,
+                                 self.count // self.every + 1)
+            os.truncate(self.snapshot_path, self.snapshots * self.snapshot_bytes)
+            if not self.snapshots:
+                raise ValueError(f"{self.snapshot_path} holds no snapshot.")
+
+        self._moves = open(path, "ab")
+        self._snapshot_file = open(self.snapshot_path, "ab")
+        if cube is None:
+            # Put back any snapshots that a crash kept from being written
+            while self.snapshots * self.every <= self.count:
+                self.cube = self.state(self.snapshots * self.every)
+                self._checkpoint()
+            cube = self.state()
+        self.cube = cube
+        if not self.snapshots:
+            self._checkpoint()
+
+    @property
+    def snapshot_bytes(self):
+        """The length of one snapshot in the snapshots file."""
+        return _SNAPSHOT.size + 6 * self.size * self.size
+
+    def _checkpoint(self):
+        self._snapshot_file.write(self.cube.snapshot())
+        self.snapshots += 1
+
+    def __len__(self):
+        return self.count
+
+    def turn(self, axis, layer, quarters=1):
+        """Turn the live cube as RubiksCube.turn does and log the turn."""
+        self.cube.turn(axis, layer, quarters)
+        self._moves.write(np.array([AXES.index(axis), layer, quarters % 4], dtype=np.int16).tobytes())
+        self.count += 1
+        if self.count % self.every == 0:
+            self._checkpoint()
+
+    def extend(self, turns):
+        """Turn and log a sequence of (axis, layer, quarters) turns, with axes as letters or indices into AXES."""
+        for axis, layer, quarters in turns:
+            self.turn(axis if isinstance(axis, str) else AXES[axis], int(layer), int(quarters))
+
+    def moves(self, start=0, stop=None):
+        """The logged turns start to stop as an (n, 3) int16 array like a scramble_array() row."""
+        stop = self.count if stop is None else min(stop, self.count)
+        self.flush()
+        if stop <= start:
+            return np.empty((0, 3), dtype=np.int16)
+        turns = np.fromfile(self.path, dtype=np.int16, count=3 * (stop - start),
+                            offset=self.HEADER.size + start * self.RECORD)
+        return turns.reshape(-1, 3)
+
+    def state(self, index=None):
+        """
+            A new cube in the state after the first `index` turns (all of
+            them by default), rebuilt from the nearest snapshot.
+        """
+        index = self.count if index is None else index
+        if not 0 <= index <= self.count:
+            raise ValueError(f"Index must be between 0 and {self.count}.")
+        self.flush()
+        checkpoint = min(index // self.every, self.snapshots - 1)
+        with open(self.snapshot_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        cube = RubiksCube.from_snapshot(data, checkpoint * self.snapshot_bytes)
+        for axis, layer, quarters in self.moves(checkpoint * self.every, index).tolist():
+            cube.turn(AXES[axis], layer, quarters)
+        return cube
+
+    def flush(self):
+        self._moves.flush()
+        self._snapshot_file.flush()
+
+    def close(self):
+        self._moves.close()
+        self._snapshot_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CubeBatch:
+    """
+        Many cubes of one size, stored as an (M, 6 * size * size) uint8 array
+        with one flat sticker vector per row, in the same layout as
+        RubiksCube. Moves are gathers through the size's MoveTable. A move
+        shared by all cubes gathers every row at once; per-cube moves index a
+        stacked table of the batch's move set, so there is no Python loop per
+        cube.
+
+        move_set lists the moves that apply_each can choose from, as tokens or
+        (axis, layer, quarters) tuples. By default it is every quarter, half
+        and anticlockwise turn of every layer. That stacked table takes
+        9 * size * 6 * size * size entries, so pass a smaller set for big cubes.
+    """
+    def __init__(self, size, count, move_set=None):
+        self.size = size
+        self.table = move_table(size)
+        solved = RubiksCube(size)._stickers.reshape(-1)
+        self.states = np.tile(solved, (count, 1))
+        if move_set is None:
+            move_set = [(axis, layer, quarters) for axis in 'xyz' for layer in range(size) for quarters in (1, 2, 3)]
+        self.move_set = [move_spec(size, move) if isinstance(move, str) else move for move in move_set]
+        self.move_perms = np.stack([self.table.permutation(*move) for move in self.move_set])
+
+    @classmethod
+    def from_cubes(cls, cubes, move_set=None):
+        """A batch holding copies of the states of some cubes of the same size."""
+        batch = cls(cubes[0].size, 0, move_set)
+        batch.states = np.stack([cube.stickers.reshape(-1) for cube in cubes])
+        return batch
+
+    def __len__(self):
+        return len(self.states)
+
+    def cube(self, index):
+        """A RubiksCube holding a copy of one state of the batch."""
+        cube = RubiksCube(self.size)
+        cube._stickers.reshape(-1)[:] = self.states[index]
+        return cube
+
+    def move_index(self, move):
+        """The index of a move in move_set, for apply_each."""
+        return self.move_set.index(move_spec(self.size, move) if isinstance(move, str) else move)
+
+    def apply(self, moves):
+        """
+            Apply the same move, sequence of moves (compiled into one
+            permutation) or permutation from compile() to every cube.
+        """
+        if isinstance(moves, np.ndarray):
+            perm = moves
+        elif isinstance(moves, (str, tuple)):
+            perm = self.table.compile([moves])
+        else:
+            perm = self.table.compile(moves)
+        self.states = self.states[:, perm]
+
+    def apply_each(self, indices):
+        """
+            Apply one move per cube, given as indices into move_set: an array
+            of shape (M,), or (M, T) to apply T moves to each cube in order.
+        """
+        indices = np.asarray(indices)
+        if indices.ndim == 1:
+            indices = indices[:, None]
+        if len(indices) != len(self.states):
+            raise ValueError(f"Expected moves for {len(self.states)} cubes, got {len(indices)}.")
+        for step in indices.T:
+            self.states = np.take_along_axis(self.states, self.move_perms[step], axis=1)
+
+    def is_solved(self):
+        """Boolean array marking the cubes whose faces are each a single colour."""
+        faces = self.states.reshape(len(self.states), 6, -1)
+        return (faces == faces[:, :, :1]).all(axis=(1, 2))
+
+    def color_counts(self):
+        """(M, 6) array of how many stickers of each colour every cube has."""
+        rows = np.arange(len(self.states), dtype=np.intp)[:, None] * len(COLORS)
+        counts = np.bincount((self.states + rows).ravel(), minlength=len(self.states) * len(COLORS))
+        return counts.reshape(len(self.states), len(COLORS))
+
+    def is_valid(self):
+        """Boolean array marking the cubes that pass every isValidCube check."""
+        return np.logical_and.reduce(list(piece_tables(self.size).check(self.states).values()))
+
+class MoveProfile:
+    """
+        Turn counts and times gathered by RubiksCube.instrument(), by move
+        family: the face for turns of an outer layer, in any direction, and
+        "x slice", "y slice" or "z slice" for inner layers. One profile can
+        be shared by many cubes.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+
+    @staticmethod
+    def family(size, axis, layer):
+        """The move family of a turn."""
+        if layer == 0:
+            return _AXIS_FACES[axis][0]
+        if layer == size - 1:
+            return _AXIS_FACES[axis][1]
+        return f"{axis} slice"
+
+    def record(self, size, axis, layer, seconds):
+        family = self.family(size, axis, layer)
+        self.counts[family] = self.counts.get(family, 0) + 1
+        self.seconds[family] = self.seconds.get(family, 0.0) + seconds
+
+    def info(self):
+        """Count, total seconds and mean microseconds of each family, the most time first."""
+        families = sorted(self.counts, key=self.seconds.get, reverse=True)
+        return {family: {"count": self.counts[family], "seconds": self.seconds[family],
+                         "mean_us": self.seconds[family] / self.counts[family] * 1e6} for family in families}
+
+    def clear(self):
+        self.counts.clear()
+        self.seconds.clear()
+
+class TranspositionTable:
+    """
+        Bounded map from cube states to search values, to skip states a BFS or
+        IDA* search has already handled. Keys are usually RubiksCube.to_bytes()
+        or, for 3x3 cubes, RubiksSolver.CubieCube.to_int(). When full it
+        evicts the least recently used entry, so memory stays bounded however
+        long the search runs.
+    """
+    # Rough bytes per entry besides the key's own bytes: the key and value objects and the dict slot
+    ENTRY_OVERHEAD = 160
+
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def for_budget(cls, budget_bytes, size):
+        """A table sized to hold about budget_bytes of to_bytes() keys of cubes of the given size."""
+        key_bytes = (18 * size * size + 7) // 8
+        return cls(max(1, budget_bytes // (key_bytes + cls.ENTRY_OVERHEAD)))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, default)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def seen(self, key, depth=0):
+        """
+            Whether the state was already reached with at least `depth` moves
+            of search left, so it need not be searched again. Otherwise records
+            it with `depth` and returns False. BFS can use depth 0 throughout.
+        """
+        stored = self.get(key)
+        if stored is not None and stored >= depth:
+            return True
+        self.put(key, depth)
+        return False
+
+    def info(self):
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions}
 
-        return map_str
+    def clear(self):
+        self.entries.clear()
 
 def main():
+    seed = int(time.time())
     cube = RubiksCube(3)
-    cube.scramble(20, int(time.time()))
-    print("Seed: " + str(int(time.time())))
+    cube.scramble(20, seed, render=True)
+    print("Seed: " + str(seed))
     
 
     
@@ -0,0 +1,685 @@
+# Solvers for the 3x3 RubiksCube: Kociemba's two-phase algorithm for fast
+# near-optimal solutions and IDA* for optimal ones.
+#
+# Both search over cubie coordinates (corner and edge permutation and
+# orientation) rather than stickers. Every coordinate has a move table and the
+# searches are pruned by distance tables, which are built once with a
+# breadth-first search, stored four bits per entry and memory-mapped from disk,
+# so worker processes share one copy through the page cache.
+
+import argparse
+import os
+import time
+from itertools import permutations
+
+import numpy as np
+
+from RubiksCube import FACES, RubiksCube
+
+# Corner and edge positions in Kociemba's order
+CORNERS = ["URF", "UFL", "ULB", "UBR", "DFR", "DLF", "DBL", "DRB"]
+EDGES = ["UR", "UF", "UL", "UB", "DR", "DF", "DL", "DB", "FR", "FL", "BL", "BR"]
+
+# The (face, row, col) stickers of each corner and edge position, starting with
+# the U or D sticker (F or B for the middle-layer edges) and going clockwise.
+CORNER_FACELETS = [
+    (('U', 2, 2), ('R', 0, 0), ('F', 0, 2)),
+    (('U', 2, 0), ('F', 0, 0), ('L', 0, 2)),
+    (('U', 0, 0), ('L', 0, 0), ('B', 0, 2)),
+    (('U', 0, 2), ('B', 0, 0), ('R', 0, 2)),
+    (('D', 0, 2), ('F', 2, 2), ('R', 2, 0)),
+    (('D', 0, 0), ('L', 2, 2), ('F', 2, 0)),
+    (('D', 2, 0), ('B', 2, 2), ('L', 2, 0)),
+    (('D', 2, 2), ('R', 2, 2), ('B', 2, 0)),
+]
+EDGE_FACELETS = [
+    (('U', 1, 2), ('R', 0, 1)),
+    (('U', 2, 1), ('F', 0, 1)),
+    (('U', 1, 0), ('L', 0, 1)),
+    (('U', 0, 1), ('B', 0, 1)),
+    (('D', 1, 2), ('R', 2, 1)),
+    (('D', 0, 1), ('F', 2, 1)),
+    (('D', 1, 0), ('L', 2, 1)),
+    (('D', 2, 1), ('B', 2, 1)),
+    (('F', 1, 2), ('R', 1, 0)),
+    (('F', 1, 0), ('L', 1, 2)),
+    (('B', 1, 2), ('L', 1, 0)),
+    (('B', 1, 0), ('R', 1, 2)),
+]
+
+# The 18 face turns, numbered face * 3 + power - 1 in this face order
+MOVE_FACES = "URFDLB"
+MOVE_NAMES = [face + suffix for face in MOVE_FACES for suffix in ("", "2", "'")]
+
+# Phase 2 keeps the cube in <U, D, R2, L2, F2, B2>
+PHASE2_MOVES = [0, 1, 2, 4, 7, 9, 10, 11, 13, 16]
+
+TWISTS = 3 ** 7
+FLIPS = 2 ** 11
+SLICES = 495
+CORNER_PERMS = 40320
+EDGE_PERMS = 40320
+SLICE_PERMS = 24
+EDGE_PLACEMENTS = 665280  # Ways to place six distinct edges in the twelve positions
+
+# The optimal solver tracks the edges in two sets of six
+EDGES_LOW = [0, 1, 2, 3, 4, 5]
+EDGES_HIGH = [6, 7, 8, 9, 10, 11]
+
+TABLE_VERSION = 2
+
+class CubieCube:
+    """
+        A 3x3 cube as corner and edge permutations and orientations: cp[i] is
+        the corner sitting at position i and co[i] its clockwise twist, and
+        likewise ep and eo for the edges.
+    """
+    def __init__(self, cp=None, co=None, ep=None, eo=None):
+        self.cp = list(range(8)) if cp is None else cp
+        self.co = [0] * 8 if co is None else co
+        self.ep = list(range(12)) if ep is None else ep
+        self.eo = [0] * 12 if eo is None else eo
+
+    def multiply(self, move):
+        """The cube after applying `move` (another CubieCube) to this one."""
+        return CubieCube([self.cp[j] for j in move.cp],
+                         [(self.co[j] + o) % 3 for j, o in zip(move.cp, move.co)],
+                         [self.ep[j] for j in move.ep],
+                         [(self.eo[j] + o) % 2 for j, o in zip(move.ep, move.eo)])
+
+    def __eq__(self, other):
+        return isinstance(other, CubieCube) and (self.cp, self.co, self.ep, self.eo) == (other.cp, other.co, other.ep, other.eo)
+
+    def to_int(self):
+        """
+            The state as one integer below 2187 * 2048 * 8! * 12! (about 2^66):
+            corner twist, edge flip, corner permutation and edge permutation
+            coordinates in mixed radix.
+        """
+        twist = int(twist_coords([self.co])[0])
+        flip = int(flip_coords([self.eo])[0])
+        corner = int(corner_coords([self.cp])[0])
+        edge = int(_perm_rank([self.ep])[0])
+        return ((edge * CORNER_PERMS + corner) * FLIPS + flip) * TWISTS + twist
+
+    @classmethod
+    def from_int(cls, value):
+        """The CubieCube encoded by to_int()."""
+        value, twist = divmod(value, TWISTS)
+        value, flip = divmod(value, FLIPS)
+        edge, corner = divmod(value, CORNER_PERMS)
+        co = [twist // 3 ** (6 - i) % 3 for i in range(7)]
+        eo = [flip >> (10 - i) & 1 for i in range(11)]
+        return cls(_perm_unrank(corner, 8), co + [-sum(co) % 3], _perm_unrank(edge, 12), eo + [sum(eo) % 2])
+
+    @classmethod
+    def from_cube(cls, cube):
+        """
+            Read the cubies off a 3x3 RubiksCube. Colours are matched to faces
+            through the centres, so a cube whose centres were moved by slice
+            turns is read relative to where they are now.
+        """
+        if cube.size != 3:
+            raise ValueError("Only 3x3 cubes can be read as cubies.")
+        faces = cube.faces
+        face_of = {faces[face][1][1]: i for i, face in enumerate(FACES)}
+        if len(face_of) != 6:
+            raise ValueError("The centres do not show six different colours.")
+
+        def sticker(face, row, col):
+            return face_of[faces[face][row][col]]
+
+        home_corners = {tuple(FACES.index(face) for face, _, _ in stickers): j
+                        for j, stickers in enumerate(CORNER_FACELETS)}
+        home_edges = {tuple(FACES.index(face) for face, _, _ in stickers): j
+                      for j, stickers in enumerate(EDGE_FACELETS)}
+        ud = (FACES.index('U'), FACES.index('D'))
+
+        cubie = cls()
+        for i, stickers in enumerate(CORNER_FACELETS):
+            colors = [sticker(*facelet) for facelet in stickers]
+            twist = next((k for k in range(3) if colors[k] in ud), None)
+            corner = None if twist is None else home_corners.get(tuple(colors[twist:] + colors[:twist]))
+            if corner is None:
+                raise ValueError(f"No corner has the colours at position {CORNERS[i]}.")
+            cubie.cp[i], cubie.co[i] = corner, twist
+        for i, stickers in enumerate(EDGE_FACELETS):
+            colors = tuple(sticker(*facelet) for facelet in stickers)
+            if colors in home_edges:
+                cubie.ep[i], cubie.eo[i] = home_edges[colors], 0
+            elif colors[::-1] in home_edges:
+                cubie.ep[i], cubie.eo[i] = home_edges[colors[::-1]], 1
+            else:
+                raise ValueError(f"No edge has the colours at position {EDGES[i]}.")
+        if sorted(cubie.cp) != list(range(8)) or sorted(cubie.ep) != list(range(12)):
+            raise ValueError("The cube has a repeated corner or edge.")
+        # The coordinates read only 7 twists and 11 flips, so an unsolvable cube has to be caught here
+        if sum(cubie.co) % 3:
+            raise ValueError("The corner twists do not add up to a multiple of 3.")
+        if sum(cubie.eo) % 2:
+            raise ValueError("An odd number of edges is flipped.")
+
+        def parity(perm):
+            return sum(perm[i] > perm[j] for i in range(len(perm)) for j in range(i + 1, len(perm))) % 2
+
+        if parity(cubie.cp) != parity(cubie.ep):
+            raise ValueError("The corner and edge permutations differ in parity.")
+        return cubie
+
+def move_cubies():
+    """
+        The 18 face turns as CubieCubes. They are read off RubiksCube itself,
+        so the solvers always follow its move conventions.
+    """
+    moves = []
+    for face in MOVE_FACES:
+        cube = RubiksCube(3)
+        cube.moves(face)
+        turn = CubieCube.from_cube(cube)
+        power = CubieCube()
+        for _ in range(3):
+            power = power.multiply(turn)
+            moves.append(power)
+    return moves
+
+# Coordinates. The *_coords functions encode rows of cubie arrays at once, so
+# the same code builds the move tables and reads a single cube.
+
+def _perm_rank(perms):
+    """Lexicographic rank of each row of an (K, n) array of permutations of 0..n-1."""
+    perms = np.asarray(perms)
+    rank = np.zeros(len(perms), dtype=np.int64)
+    n = perms.shape[1]
+    for i in range(n):
+        rank = rank * (n - i) + (perms[:, i + 1:] < perms[:, i:i + 1]).sum(axis=1)
+    return rank
+
+def _perm_unrank(rank, n):
+    """The permutation of 0..n-1 with the given lexicographic rank."""
+    digits = []
+    for radix in range(1, n + 1):
+        rank, digit = divmod(rank, radix)
+        digits.append(digit)
+    remaining = list(range(n))
+    return [remaining.pop(digit) for digit in reversed(digits)]
+
+def _all_perms(n):
+    """All permutations of 0..n-1 in lexicographic order, so row r has rank r."""
+    return np.array(list(permutations(range(n))), dtype=np.int8)
+
+# The 495 ways to place the four middle-layer edges, as 12-bit masks of positions
+_SLICE_MASKS = np.array([mask for mask in range(1 << 12) if bin(mask).count("1") == 4])
+_SLICE_RANK = np.zeros(1 << 12, dtype=np.int64)
+_SLICE_RANK[_SLICE_MASKS] = np.arange(SLICES)
+SLICE_SOLVED = int(_SLICE_RANK[0xF00])
+
+def twist_coords(co):
+    return np.asarray(co)[:, :7] @ (3 ** np.arange(6, -1, -1))
+
+def flip_coords(eo):
+    return np.asarray(eo)[:, :11] @ (2 ** np.arange(10, -1, -1))
+
+def slice_coords(ep):
+    return _SLICE_RANK[(np.asarray(ep) >= 8) @ (1 << np.arange(12))]
+
+def corner_coords(cp):
+    return _perm_rank(cp)
+
+def _placement_rank(positions, n):
+    """Lexicographic rank of each row of a (K, k) array of distinct positions below n."""
+    positions = np.asarray(positions)
+    rank = np.zeros(len(positions), dtype=np.int64)
+    for i in range(positions.shape[1]):
+        rank = rank * (n - i) + positions[:, i] - (positions[:, :i] < positions[:, i:i + 1]).sum(axis=1)
+    return rank
+
+def edge_set_coords(ep, eo, edges):
+    """
+        Where six given edges are and how they are flipped, as placement * 64
+        + flips, with the placement ranked as in permutations(range(12), 6).
+    """
+    where = np.argsort(np.asarray(ep), axis=1)[:, edges]
+    flips = np.take_along_axis(np.asarray(eo), where, axis=1) @ (1 << np.arange(5, -1, -1))
+    return _placement_rank(where, 12) * 64 + flips
+
+EDGES_LOW_SOLVED, EDGES_HIGH_SOLVED = (int(edge_set_coords([range(12)], [[0] * 12], edges)[0])
+                                       for edges in (EDGES_LOW, EDGES_HIGH))
+
+def edge_coords(ep):
+    """Permutation of the eight U and D edges, only meaningful in phase 2."""
+    return _perm_rank(np.asarray(ep)[:, :8])
+
+def slice_perm_coords(ep):
+    """Permutation of the four middle-layer edges, only meaningful in phase 2."""
+    return _perm_rank(np.asarray(ep)[:, 8:] - 8)
+
+def _move_table(states, moves, apply, encode):
+    """(len(states), len(moves)) table of the coordinate reached by each move from each decoded state."""
+    return np.stack([encode(apply(states, move)) for move in moves], axis=1)
+
+def _breadth_first(size, start, neighbours, chunk=1 << 18):
+    """
+        Distances to `start` over `size` states, where neighbours(states) has
+        a row of the states one move away from each. Levels are expanded in
+        chunks so that tables of tens of millions of states fit in memory.
+        Once fewer states are unreached than the last level holds, each
+        unreached state looks for a neighbour in that level instead, which
+        works as every move's inverse is also a move.
+    """
+    dist = np.full(size, 255, dtype=np.uint8)
+    dist[start] = 0
+    depth = 0
+    unreached = size - 1
+    level = 1
+    while level and unreached:
+        backward = unreached < level
+        states = np.flatnonzero(dist == (255 if backward else depth))
+        for i in range(0, len(states), chunk):
+            part = states[i:i + chunk]
+            reached = neighbours(part)
+            if backward:
+                dist[part[(dist[reached] == depth).any(axis=1)]] = depth + 1
+            else:
+                reached = reached.ravel()
+                dist[reached[dist[reached] == 255]] = depth + 1
+        depth += 1
+        level = int(np.count_nonzero(dist == depth))
+        unreached -= level
+    return dist
+
+def _distance_table(move_a, move_b, start):
+    """
+        Breadth-first distances to `start` over pairs of coordinates, indexed
+        a * len(move_b) + b, where both move tables have a column per move.
+    """
+    size_b = len(move_b)
+
+    def neighbours(states):
+        a, b = np.divmod(states, size_b)
+        return move_a[a].astype(np.int64) * size_b + move_b[b]
+
+    return _breadth_first(len(move_a) * size_b, start, neighbours)
+
+def _edge_set_table(edge_set_move, start):
+    """Breadth-first distances to `start` over the edge_set_coords() of six edges."""
+    def neighbours(states):
+        return edge_set_move[states >> 6].astype(np.int64) ^ (states & 63)[:, None]
+
+    return _breadth_first(EDGE_PLACEMENTS * 64, start, neighbours)
+
+def _pack_nibbles(dist):
+    """Store distances (all below 16) four bits each, two to a byte."""
+    if len(dist) % 2:
+        dist = np.append(dist, 0)
+    return (dist[0::2] | (dist[1::2] << 4)).astype(np.uint8)
+
+def build_tables():
+    """
+        Build every move and pruning table. Returns a dict of name to array;
+        pruning tables (names starting with 'prune_') are nibble-packed.
+    """
+    moves = move_cubies()
+    phase2 = [moves[m] for m in PHASE2_MOVES]
+    tables = {}
+
+    def twist_states():
+        digits = np.array(list(np.ndindex(*(3,) * 7)), dtype=np.int64)
+        return np.hstack([digits, (-digits.sum(axis=1) % 3)[:, None]])
+
+    def flip_states():
+        digits = np.array(list(np.ndindex(*(2,) * 11)), dtype=np.int64)
+        return np.hstack([digits, (digits.sum(axis=1) % 2)[:, None]])
+
+    def slice_states():
+        return ((_SLICE_MASKS[:, None] >> np.arange(12)) & 1) * 8
+
+    def ud_edge_states():
+        perms = _all_perms(8).astype(np.int64)
+        return np.hstack([perms, np.tile(np.arange(8, 12), (len(perms), 1))])
+
+    def slice_perm_states():
+        perms = _all_perms(4).astype(np.int64) + 8
+        return np.hstack([np.tile(np.arange(8), (len(perms), 1)), perms])
+
+    def edge_set_move(placements, move):
+        # The edge at position j moves to where move.ep holds j, and its flip changes by that position's
+        moved = np.argsort(move.ep)[placements]
+        return _placement_rank(moved, 12) * 64 + np.asarray(move.eo)[moved] @ (1 << np.arange(5, -1, -1))
+
+    tables["twist_move"] = _move_table(twist_states(), moves, lambda co, m: (co[:, m.cp] + m.co) % 3,
+                                       twist_coords).astype(np.uint16)
+    tables["flip_move"] = _move_table(flip_states(), moves, lambda eo, m: (eo[:, m.ep] + m.eo) % 2,
+                                      flip_coords).astype(np.uint16)
+    tables["slice_move"] = _move_table(slice_states(), moves, lambda ep, m: ep[:, m.ep],
+                                       slice_coords).astype(np.uint16)
+    tables["corner_move"] = _move_table(_all_perms(8), moves, lambda cp, m: cp[:, m.cp],
+                                        corner_coords).astype(np.uint16)
+    tables["edge_move"] = _move_table(ud_edge_states(), phase2, lambda ep, m: ep[:, m.ep],
+                                      edge_coords).astype(np.uint16)
+    tables["slice_perm_move"] = _move_table(slice_perm_states(), phase2, lambda ep, m: ep[:, m.ep],
+                                            slice_perm_coords).astype(np.uint16)
+    # Placements of six edges and the flips the move gives them, for any six: XOR in their old flips
+    placements = np.array(list(permutations(range(12), 6)), dtype=np.int64)
+    tables["edge_set_move"] = np.stack([edge_set_move(placements, move) for move in moves], axis=1).astype(np.uint32)
+
+    corner_phase2 = tables["corner_move"][:, PHASE2_MOVES]
+    tables["prune_slice_twist"] = _pack_nibbles(
+        _distance_table(tables["slice_move"], tables["twist_move"], SLICE_SOLVED * TWISTS))
+    tables["prune_slice_flip"] = _pack_nibbles(
+        _distance_table(tables["slice_move"], tables["flip_move"], SLICE_SOLVED * FLIPS))
+    tables["prune_slice_corner"] = _pack_nibbles(
+        _distance_table(tables["slice_perm_move"], corner_phase2, 0))
+    tables["prune_slice_edge"] = _pack_nibbles(
+        _distance_table(tables["slice_perm_move"], tables["edge_move"], 0))
+    tables["prune_corner"] = _pack_nibbles(_distance_table(tables["corner_move"], tables["twist_move"], 0))
+    tables["prune_edges_low"] = _pack_nibbles(_edge_set_table(tables["edge_set_move"], EDGES_LOW_SOLVED))
+    tables["prune_edges_high"] = _pack_nibbles(_edge_set_table(tables["edge_set_move"], EDGES_HIGH_SOLVED))
+    return tables
+
+def default_table_path():
+    return os.environ.get("RUBIKS_TABLES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rubiks_tables"))
+
+def load_tables(path=None, rebuild=False):
+    """
+        Memory-map the tables from `path` (default_table_path() if None),
+        building and saving them first if they are missing. Returns the dict of
+        arrays and the seconds spent building (0 when they were loaded).
+    """
+    path = path or default_table_path()
+    marker = os.path.join(path, f"v{TABLE_VERSION}")
+    build_time = 0.0
+    if rebuild or not os.path.exists(marker):
+        start = time.perf_counter()
+        tables = build_tables()
+        build_time = time.perf_counter() - start
+        os.makedirs(path, exist_ok=True)
+        for name, table in tables.items():
+            # Write then rename, so a process loading concurrently never sees half a table
+            partial = os.path.join(path, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(partial, table)
+            os.replace(partial, os.path.join(path, f"{name}.npy"))
+        open(marker, "w").close()
+        names = tables
+    else:
+        names = [name[:-4] for name in os.listdir(path) if name.endswith(".npy") and ".tmp" not in name]
+    return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in names}, build_time
+
+def merge_turns(moves):
+    """Merge consecutive turns of the same face in a list of move numbers, dropping those that cancel."""
+    merged = []
+    for m in moves:
+        if merged and merged[-1] // 3 == m // 3:
+            quarters = (merged.pop() % 3 + m % 3 + 2) % 4
+            if quarters:
+                merged.append(m // 3 * 3 + quarters - 1)
+        else:
+            merged.append(m)
+    return merged
+
+class SearchTimeout(Exception):
+    pass
+
+class TwoPhaseSolver:
+    """
+        Solves 3x3 cubes with Kociemba's two-phase algorithm (solve) or with
+        plain IDA* for an optimal solution (solve_optimal).
+
+        Phase 1 brings the cube into the subgroup <U, D, R2, L2, F2, B2>, where
+        every piece is oriented and the middle-layer edges are in the middle
+        layer. Phase 2 solves it with those moves only. Both phases are
+        iterative-deepening searches pruned by the maximum of two distance
+        tables. Move tables are copied into lists, which index faster than
+        arrays, and the pruning tables are read in place from the mapped files.
+    """
+    def __init__(self, path=None):
+        self.tables, self.build_time = load_tables(path)
+        t = self.tables
+        self.twist_move = t["twist_move"].ravel().tolist()
+        self.flip_move = t["flip_move"].ravel().tolist()
+        self.slice_move = t["slice_move"].ravel().tolist()
+        self.corner_move = t["corner_move"].ravel().tolist()
+        self.edge_move = t["edge_move"].ravel().tolist()
+        self.slice_perm_move = t["slice_perm_move"].ravel().tolist()
+        self.prune_slice_twist = memoryview(t["prune_slice_twist"])
+        self.prune_slice_flip = memoryview(t["prune_slice_flip"])
+        self.prune_slice_corner = memoryview(t["prune_slice_corner"])
+        self.prune_slice_edge = memoryview(t["prune_slice_edge"])
+        # Far too big to copy into lists, so the optimal solver reads this move table in place too
+        self.edge_set_move = memoryview(t["edge_set_move"].reshape(-1))
+        self.prune_corner = memoryview(t["prune_corner"])
+        self.prune_edges_low = memoryview(t["prune_edges_low"])
+        self.prune_edges_high = memoryview(t["prune_edges_high"])
+        self.moves = move_cubies()
+        self.nodes = 0
+        self.deadline = None
+
+    def table_bytes(self):
+        """Bytes of each table on disk."""
+        return {name: table.nbytes for name, table in self.tables.items()}
+
+    def _tick(self):
+        self.nodes += 1
+        if self.deadline is not None and not self.nodes & 1023 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    def _phase1_bound(self, twist, flip, slice_):
+        a = slice_ * TWISTS + twist
+        b = slice_ * FLIPS + flip
+        return max((self.prune_slice_twist[a >> 1] >> ((a & 1) << 2)) & 15,
+                   (self.prune_slice_flip[b >> 1] >> ((b & 1) << 2)) & 15)
+
+    def _phase2_bound(self, corner, edge, slice_perm):
+        a = slice_perm * CORNER_PERMS + corner
+        b = slice_perm * EDGE_PERMS + edge
+        return max((self.prune_slice_corner[a >> 1] >> ((a & 1) << 2)) & 15,
+                   (self.prune_slice_edge[b >> 1] >> ((b & 1) << 2)) & 15)
+
+    def _phase1(self, twist, flip, slice_, depth, last, path):
+        self._tick()
+        if depth == 0:
+            # A path ending in a phase 2 move would have reached the subgroup one move earlier
+            return not (path and path[-1] in PHASE2_MOVES) and self._phase2_start(path)
+        for m in range(18):
+            face = m // 3
+            # Skip turning a face twice in a row, and fix the order of turns of opposite faces
+            if face == last or face == last - 3:
+                continue
+            t = self.twist_move[twist * 18 + m]
+            f = self.flip_move[flip * 18 + m]
+            s = self.slice_move[slice_ * 18 + m]
+            if self._phase1_bound(t, f, s) < depth:
+                path.append(m)
+                if self._phase1(t, f, s, depth - 1, face, path):
+                    return True
+                path.pop()
+        return False
+
+    def _phase2_start(self, path):
+        cubie = self.start
+        for m in path:
+            cubie = cubie.multiply(self.moves[m])
+        corner = int(corner_coords([cubie.cp])[0])
+        edge = int(edge_coords([cubie.ep])[0])
+        slice_perm = int(slice_perm_coords([cubie.ep])[0])
+        limit = min(self.phase2_limit, self.max_length - len(path))
+        # Phase 2 may start on the face phase 1 ended with (R then R2 is R'); solve() merges such pairs
+        for depth in range(self._phase2_bound(corner, edge, slice_perm), limit + 1):
+            tail = []
+            if self._phase2(corner, edge, slice_perm, depth, -9, tail):
+                self.solution = path + tail
+                return True
+        return False
+
+    def _phase2(self, corner, edge, slice_perm, depth, last, path):
+        self._tick()
+        if depth == 0:
+            return corner == 0 and edge == 0 and slice_perm == 0
+        # The innermost loop of the solver, so the bounds are inlined and the second is only read if the first passes
+        corner_move, edge_move, slice_perm_move = self.corner_move, self.edge_move, self.slice_perm_move
+        prune_corner, prune_edge = self.prune_slice_corner, self.prune_slice_edge
+        for j, m in enumerate(PHASE2_MOVES):
+            face = m // 3
+            if face == last or face == last - 3:
+                continue
+            s = slice_perm_move[slice_perm * 10 + j]
+            c = corner_move[corner * 18 + m]
+            a = s * CORNER_PERMS + c
+            if (prune_corner[a >> 1] >> ((a & 1) << 2)) & 15 >= depth:
+                continue
+            e = edge_move[edge * 10 + j]
+            b = s * EDGE_PERMS + e
+            if (prune_edge[b >> 1] >> ((b & 1) << 2)) & 15 >= depth:
+                continue
+            path.append(m)
+            if self._phase2(c, e, s, depth - 1, face, path):
+                return True
+            path.pop()
+        return False
+
+    def solve(self, cube, max_length=24, timeout=None, phase2_limit=12):
+        """
+            A solution of at most max_length face turns as a list of moves
+            (such as "R", "U2", "F'") that cube.moves() accepts, or None if the
+            search found none within the timeout (in seconds).
+
+            Phase 1 solutions are tried from the shortest up, each completed by
+            the shortest phase 2 of at most phase2_limit moves that keeps the
+            total within max_length. A lower max_length gives shorter solutions
+            at the price of more search; 22 or more is usually quick.
+        """
+        self.start = CubieCube.from_cube(cube)
+        self.max_length = max_length
+        self.phase2_limit = phase2_limit
+        self.solution = None
+        self.nodes = 0
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        twist = int(twist_coords([self.start.co])[0])
+        flip = int(flip_coords([self.start.eo])[0])
+        slice_ = int(slice_coords([self.start.ep])[0])
+        try:
+            for depth in range(self._phase1_bound(twist, flip, slice_), max_length + 1):
+                if self._phase1(twist, flip, slice_, depth, -9, []):
+                    return [MOVE_NAMES[m] for m in merge_turns(self.solution)]
+        except SearchTimeout:
+            pass
+        return None
+
+    def _optimal_bound(self, corner, twist, low, high):
+        a = corner * TWISTS + twist
+        return max((self.prune_corner[a >> 1] >> ((a & 1) << 2)) & 15,
+                   (self.prune_edges_low[low >> 1] >> ((low & 1) << 2)) & 15,
+                   (self.prune_edges_high[high >> 1] >> ((high & 1) << 2)) & 15)
+
+    def _optimal(self, corner, twist, low, high, depth, last, path):
+        self._tick()
+        if depth == 0:
+            # Solved corners and both sets of edges in place and unflipped are the solved cube
+            return corner == 0 and twist == 0 and low == EDGES_LOW_SOLVED and high == EDGES_HIGH_SOLVED
+        # Bounds as in _phase2: each table is read only if the ones before it pass
+        corner_move, twist_move, edge_set_move = self.corner_move, self.twist_move, self.edge_set_move
+        prune_corner, prune_low, prune_high = self.prune_corner, self.prune_edges_low, self.prune_edges_high
+        for m in range(18):
+            face = m // 3
+            if face == last or face == last - 3:
+                continue
+            c = corner_move[corner * 18 + m]
+            t = twist_move[twist * 18 + m]
+            a = c * TWISTS + t
+            if (prune_corner[a >> 1] >> ((a & 1) << 2)) & 15 >= depth:
+                continue
+            lo = edge_set_move[(low >> 6) * 18 + m] ^ (low & 63)
+            if (prune_low[lo >> 1] >> ((lo & 1) << 2)) & 15 >= depth:
+                continue
+            hi = edge_set_move[(high >> 6) * 18 + m] ^ (high & 63)
+            if (prune_high[hi >> 1] >> ((hi & 1) << 2)) & 15 >= depth:
+                continue
+            path.append(m)
+            if self._optimal(c, t, lo, hi, depth - 1, face, path):
+                return True
+            path.pop()
+        return False
+
+    def solve_optimal(self, cube, max_depth=20, timeout=None):
+        """
+            A shortest solution in face turns, or None if there is none within
+            max_depth moves or the timeout. The search is bounded by the
+            largest of three distance tables: the corners, and each half of
+            the edges with their flips. Cubes up to about 13 moves from solved
+            take seconds, and each move deeper costs roughly ten times more.
+        """
+        self.start = CubieCube.from_cube(cube)
+        self.nodes = 0
+        self.deadline = None if timeout is None else time.perf_counter() + timeout
+        corner = int(corner_coords([self.start.cp])[0])
+        twist = int(twist_coords([self.start.co])[0])
+        low, high = (int(edge_set_coords([self.start.ep], [self.start.eo], edges)[0])
+                     for edges in (EDGES_LOW, EDGES_HIGH))
+        try:
+            for depth in range(self._optimal_bound(corner, twist, low, high), max_depth + 1):
+                path = []
+                if self._optimal(corner, twist, low, high, depth, -9, path):
+                    return [MOVE_NAMES[m] for m in path]
+        except SearchTimeout:
+            pass
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve random 3x3 cubes and report table and solve costs.")
+    parser.add_argument("--tables", help="directory of the pruning tables (default: rubiks_tables next to this file)")
+    parser.add_argument("--rebuild", action="store_true", help="build the tables even if they are on disk")
+    parser.add_argument("--cubes", type=int, default=20, help="random cubes to solve")
+    parser.add_argument("--scramble", type=int, default=30, help="random face turns per cube")
+    parser.add_argument("--max-length", type=int, default=24, help="longest solution to accept, in face turns")
+    parser.add_argument("--optimal", action="store_true", help="solve optimally with IDA* (use short scrambles)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        load_tables(args.tables, rebuild=True)
+    start = time.perf_counter()
+    solver = TwoPhaseSolver(args.tables)
+    load_time = time.perf_counter() - start - solver.build_time
+    if solver.build_time:
+        print(f"Built tables in {solver.build_time:.1f}s")
+    print(f"Loaded tables in {load_time * 1e3:.0f}ms, {sum(solver.table_bytes().values()) / 1e6:.1f} MB:")
+    for name, size in solver.table_bytes().items():
+        print(f"  {name:<20} {size:>10,} bytes")
+
+    rng = np.random.default_rng(args.seed)
+    lengths = []
+    nodes = failed_nodes = 0
+    elapsed = failed_elapsed = 0.0
+    for index in range(args.cubes):
+        cube = RubiksCube(3)
+        scramble = [MOVE_NAMES[m] for m in rng.integers(0, 18, args.scramble)]
+        for move in scramble:
+            cube.moves(move)
+        start = time.perf_counter()
+        if args.optimal:
+            solution = solver.solve_optimal(cube, args.max_length)
+        else:
+            solution = solver.solve(cube, args.max_length)
+        seconds = time.perf_counter() - start
+        if solution is None:
+            failed_nodes += solver.nodes
+            failed_elapsed += seconds
+            print(f"Cube {index + 1} has no solution within {args.max_length} moves: {' '.join(scramble)}")
+            continue
+        nodes += solver.nodes
+        elapsed += seconds
+        for move in solution:
+            cube.moves(move)
+        if not all(len(set(color for row in face for color in row)) == 1 for face in cube.faces.values()):
+            raise RuntimeError("The solution does not solve the cube.")
+        lengths.append(len(solution))
+    if lengths:
+        print(f"Solved {len(lengths)} of {args.cubes} cubes in {elapsed:.2f}s: {len(lengths) / elapsed:.1f} solves/s, "
+              f"{sum(lengths) / len(lengths):.1f} moves on average (max {max(lengths)}), "
+              f"{nodes / len(lengths):,.0f} nodes/solve")
+    else:
+        print(f"Solved none of {args.cubes} cubes")
+    if len(lengths) < args.cubes:
+        print(f"Gave up on {args.cubes - len(lengths)} of {args.cubes} cubes after {failed_elapsed:.2f}s and {failed_nodes:,} nodes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# Benchmarks for SudokuSolver
+
+import argparse
+import platform
+import random
+import time
+from typing import Dict, List, Optional
+
+import Benchmark
+from Benchmark import percentile
+from SudokuSolver import (STRATEGIES, CandidateGrid, SearchStats, board_geometry, geometry, givens, parse_puzzle,
+                          read_puzzles, solveSudoku)
+
+# Bundled corpora, so the suite runs offline and every run times the same work.
+CORPORA = {
+    # Solved by singles alone, or nearly so
+    "easy": [
+        "..3.2.6..9..3.5..1..18.64....81.29..7.......8..67.82....26.95..8..2.3..9..5.1.3..",
+        "2...8.3...6..7..84.3.5..2.9...1.54.8.........4.27.6...3.1..7.4.72..4..6...4.1...3",
+        "......9.7...42.18....7.5.261..9.4....5.....4....5.7..992.1.8....34.59...5.7......",
+        ".3..5..4...8.1.5..46.....12.7.5.2.8....6.3....4.1.9.3.25.....98..1.2.6...8..6..2.",
+        ".2.81.74.7....31...9...28.5..9.4..874..2.8..316..3.2..3.27...6...56....8.76.51.9.",
+        "53..7....6..195....98....6.8...6...34..8.3..17...2...6.6....28....419..5....8..79",
+    ],
+    # Need real search: the top95 opener, AI Escargot, Easter Monster and friends
+    "hard": [
+        "4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......",
+        "52...6.........7.13...........4..8..6......5...........418.........3..2...87.....",
+        "6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....",
+        "1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..",
+        "1.......2.9.4...5...6...7...5.9.3.......7.......85..4.7.....6...3...9.8...2.....1",
+    ],
+    # Minimal puzzles from the known 17-clue collection
+    "17clue": [
+        ".......1.4.........2...........5.4.7..8...3....1.9....3..4..2...5.1........8.6...",
+        ".......1.4.........2...........5.6.4..8...3....1.9....3..4..2...5.1........8.7...",
+        ".......12....35......6...7.7.....3.....4..8..1...........12.....8.....4..5....6..",
+        ".......12..36..........7...41..2.......5..3..7.....6..28.....4....3..5...........",
+        ".......12..8.3...........4.12.5..........47...6.......5.7...3.....62.......1.....",
+    ],
+    # Built against a solver: the anti-backtracking puzzle, one with exactly
+    # two solutions (the first with a unique rectangle emptied, then thinned
+    # while it kept two) and one with none that takes search to refute
+    "pathological": [
+        "..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9",
+        ".87.5....2.....9..3.1.....6....3......4..2...7.5...83.....8.4...723...6...3.45.1.",
+        ".....5.8....6.1.43..........1.5........1.6...3.......553.....61........4.........",
+    ],
+}
+
+
+def random_board(box: int, clues: float, seed: int) -> List[List[str]]:
+    """
+        Build a random solvable n x n puzzle (n = box * box) keeping about `clues` of the cells.
+
+        A valid grid comes from the standard pattern (box * (r % box) + r // box + c) % n,
+        shuffled by rows within bands, bands, columns within stacks, stacks
+        and symbols, and then cells are blanked at random. The result need not
+        have a unique solution, which is fine for timing.
+    """
+    rng = random.Random(seed)
+    geo = geometry(box)
+    n = geo.n
+
+    def shuffled_lines():
+        bands = rng.sample(range(box), box)
+        return [band * box + line for band in bands for line in rng.sample(range(box), box)]
+
+    rows = shuffled_lines()
+    cols = shuffled_lines()
+    symbols = rng.sample(geo.symbols, n)
+    board = [[symbols[(box * (r % box) + r // box + c) % n] for c in cols] for r in rows]
+    for r in range(n):
+        for c in range(n):
+            if rng.random() >= clues:
+                board[r][c] = '.'
+    return board
+
+def bench_sizes(boxes=(2, 3, 4, 5, 6), puzzles: int = 5, clues: float = 0.65, seed: int = 0) -> List[dict]:
+    """
+        Time the propagation solver on random puzzles of each box size, printing one line per grid size.
+
+        Randomly blanked grids get very hard to search when roughly half the
+        cells are given (the same phase transition as Latin square completion),
+        so the default keeps enough clues for the cost to reflect the grid size
+        rather than the luck of the search.
+    """
+    results = []
+    print(f"{'grid':>7} {'cells':>6} {'mean ms':>9} {'max ms':>9} {'us/cell':>8} {'nodes':>7}")
+    for box in boxes:
+        n = box * box
+        times = []
+        nodes = 0
+        for i in range(puzzles):
+            board = random_board(box, clues, seed + i)
+            start = time.perf_counter()
+            geo = board_geometry(board)
+            grid = CandidateGrid(geo)
+            if not all(grid.assign(cell, bit) for cell, bit in givens(board, geo)) or not grid.search():
+                raise RuntimeError(f"Failed on a solvable {n}x{n} board.")
+            times.append(time.perf_counter() - start)
+            nodes += grid.nodes
+
+        mean = sum(times) / len(times)
+        results.append({"grid": n, "cells": n * n, "mean_s": mean, "max_s": max(times), "nodes": nodes / puzzles})
+        print(f"{f'{n}x{n}':>7} {n * n:>6} {mean * 1e3:>9.2f} {max(times) * 1e3:>9.2f} "
+              f"{mean * 1e6 / (n * n):>8.2f} {nodes / puzzles:>7.1f}")
+    return results
+
+def bench_corpus(puzzles: List[str], strategy: str, repeat: int = 1, timeout: Optional[float] = 2.0) -> dict:
+    """
+        Solve every puzzle `repeat` times with one strategy and summarise the run.
+
+        Each solve gets its own SearchStats, so a puzzle that hits the timeout
+        is counted as aborted instead of stalling the suite. Its time still
+        counts toward the latencies.
+    """
+    latencies = []
+    nodes = 0
+    solved = aborted = 0
+    for _ in range(repeat):
+        for puzzle in puzzles:
+            board = parse_puzzle(puzzle)
+            stats = SearchStats(timeout=timeout)
+            start = time.perf_counter()
+            solveSudoku(board, strategy, stats)
+            latencies.append(time.perf_counter() - start)
+            nodes += stats.nodes
+            solved += stats.status == "solved"
+            aborted += stats.aborted
+
+    total = sum(latencies)
+    return {
+        "puzzles": len(latencies),
+        "solved": solved,
+        "aborted": aborted,
+        "puzzles_per_s": len(latencies) / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "nodes_per_puzzle": nodes / len(latencies),
+    }
+
+def bench_suite(corpora: Dict[str, List[str]], strategies=tuple(STRATEGIES), repeat: int = 1,
+                timeout: Optional[float] = 2.0) -> dict:
+    """Run every strategy on every corpus, printing one line per pair, and return the JSON-ready report."""
+    results = {}
+    print(f"{'corpus':>13} {'strategy':>10} {'puzzles/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'nodes':>9} {'aborted':>8}")
+    for name, puzzles in corpora.items():
+        for strategy in strategies:
+            result = bench_corpus(puzzles, strategy, repeat, timeout)
+            results[f"{name}/{strategy}"] = result
+            print(f"{name:>13} {strategy:>10} {result['puzzles_per_s']:>10.1f} {result['p50_ms']:>9.2f} "
+                  f"{result['p99_ms']:>9.2f} {result['nodes_per_puzzle']:>9.1f} {result['aborted']:>8}")
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(), "repeat": repeat,
+                 "timeout": timeout, "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+
+def compare(old: dict, new: dict, threshold: float = 0.2) -> List[str]:
+    """
+        Print how each corpus/strategy pair moved between two reports and
+        return the pairs that regressed. A pair regresses if its p50 latency
+        grew by more than `threshold` (a fraction), or if it solved fewer
+        puzzles or needed more nodes. Solved and node counts of runs where no
+        solve hit the timeout do not depend on timing noise, so only those are
+        compared, and any change there is a real change in the search.
+    """
+    def regressed(before, after):
+        # Node counts of runs cut short by the timeout depend on the machine
+        deterministic = not after["aborted"] and not before["aborted"]
+        return deterministic and (after["solved"] < before["solved"]
+                                  or after["nodes_per_puzzle"] > before["nodes_per_puzzle"])
+
+    return Benchmark.compare(old, new, ("p50 ms", "p50_ms", "8.2f"), ("nodes", "nodes_per_puzzle", "9.1f"),
+                             threshold, regressed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for SudokuSolver.")
+    commands = parser.add_subparsers(dest="command")
+
+    suite = commands.add_parser("suite", help="time each strategy on the bundled corpora (the default)")
+    suite.add_argument("--corpora", nargs="+", choices=sorted(CORPORA), default=list(CORPORA))
+    suite.add_argument("--corpus", action="append", default=[], metavar="FILE",
+                       help="extra corpus of puzzles, one per line or CSV as read by SudokuSolver")
+    suite.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), default=list(STRATEGIES))
+    suite.add_argument("--repeat", type=int, default=3, help="times to solve each puzzle")
+    suite.add_argument("--timeout", type=float, default=2.0, help="seconds allowed per solve")
+    Benchmark.add_report_arguments(suite)
+
+    sizes = commands.add_parser("sizes", help="time the propagation solver across grid sizes")
+    sizes.add_argument("--boxes", type=int, nargs="+", default=[2, 3, 4, 5, 6],
+                       help="box sizes to benchmark (3 is a 9x9 grid, 5 a 25x25 grid)")
+    sizes.add_argument("--puzzles", type=int, default=5, help="puzzles per grid size")
+    sizes.add_argument("--clues", type=float, default=0.65, help="fraction of cells given")
+    sizes.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    if args.command == "sizes":
+        bench_sizes(args.boxes, args.puzzles, args.clues, args.seed)
+        return
+    if args.command is None:
+        args = suite.parse_args([])
+
+    corpora = {name: CORPORA[name] for name in args.corpora}
+    for path in args.corpus:
+        with open(path) as f:
+            corpora[path] = list(read_puzzles(f))
+    report = bench_suite(corpora, args.strategies, args.repeat, args.timeout)
+    Benchmark.save_report(report, args, compare)
+
+if __name__ == "__main__":
+    main()
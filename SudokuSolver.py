@@ -1,4 +1,17 @@
-from typing import List
+import argparse
+import dbm
+import multiprocessing
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import groupby, islice, permutations, product
+from math import factorial, isqrt
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
 """
 Write a program to solve a Sudoku puzzle by filling the empty cells. 
 A Sudoku solution must satisfy all of the following rules: 
@@ -21,86 +34,1290 @@ Example Board:
 """
 
 
-def solveSudoku(board: List[List[str]]) -> None:
-    numBoard = dict()
-
-    # Gather all the numbers in the board
-    for i in range(0, 9):
-        for j in range(0, 9):
-            if board[i][j] != '.':
-                subBox_i = i // 3
-                subBox_j = j // 3
-                if board[i][j] not in numBoard:
-                    numBoard[board[i][j]] = [[i, j, [subBox_i, subBox_j]]]
-                else: # Append to the list of the key
-                    numBoard[board[i][j]].append([i, j, [subBox_i, subBox_j]])
-    
-    solve(0, board, numBoard)
-    print(board)
-
-def solve(cellNo : int, board: List[List[str]], numBoard: dict) -> bool:
-    # Base case if the row is 9 and the col is 0
-    if cellNo == 81:
+class Geometry:
+    """
+        Index tables for an n x n board made of box x box boxes (n = box * box).
+
+        Digits are the tokens "1" to str(n) and each is stored as one bit
+        (digit d -> 1 << (d - 1)), so a row, column or box can be checked for a
+        digit with a single AND instead of a list scan. Cells are numbered in
+        row-major order. Units 0..n-1 are the rows, n..2n-1 the columns and
+        2n..3n-1 the boxes, and a cell's peers are the other cells in its units.
+    """
+
+    def __init__(self, box: int):
+        n = box * box
+        self.box = box
+        self.n = n
+        self.cells = n * n
+        self.all_digits = (1 << n) - 1
+        self.symbols = [str(d) for d in range(1, n + 1)]
+        self.bits = {symbol: 1 << d for d, symbol in enumerate(self.symbols)}
+        self.box_of = [(cell // n // box) * box + (cell % n) // box for cell in range(self.cells)]
+        self.units = ([[r * n + c for c in range(n)] for r in range(n)] +
+                      [[r * n + c for r in range(n)] for c in range(n)] +
+                      [[cell for cell in range(self.cells) if self.box_of[cell] == b] for b in range(n)])
+        self.cell_units = [(cell // n, n + cell % n, 2 * n + self.box_of[cell]) for cell in range(self.cells)]
+        self.peers = [sorted({peer for unit in self.cell_units[cell] for peer in self.units[unit]} - {cell})
+                      for cell in range(self.cells)]
+
+@lru_cache(maxsize=None)
+def geometry(box: int) -> Geometry:
+    """The shared Geometry for a given box size."""
+    return Geometry(box)
+
+def board_geometry(board: List[List[str]]) -> Geometry:
+    """The Geometry matching a board's size; raises ValueError for a non-square board."""
+    n = len(board)
+    box = isqrt(n)
+    if box < 2 or box * box != n or any(len(row) != n for row in board):
+        raise ValueError(f"A board must be n x n with n a square number of at least 4, got {n} rows.")
+    return geometry(box)
+
+def check_givens(board: List[List[str]], geo: Geometry) -> None:
+    """Raise ValueError if a cell holds anything but '.' or one of the board's symbols."""
+    for i, line in enumerate(board):
+        for j, token in enumerate(line):
+            if token != '.' and token not in geo.bits:
+                raise ValueError(f"Invalid cell value {token!r} at ({i}, {j}).")
+
+def givens(board: List[List[str]], geo: Geometry) -> Iterator[Tuple[int, int]]:
+    """Yield (cell, digit bit) for every filled cell of the board."""
+    n = geo.n
+    for i in range(n):
+        for j in range(n):
+            token = board[i][j]
+            if token != '.':
+                bit = geo.bits.get(token)
+                if bit is None:
+                    raise ValueError(f"Invalid cell value {token!r} at ({i}, {j}).")
+                yield i * n + j, bit
+
+
+class SearchStats:
+    """
+        Counters for one solve, plus optional limits that stop it early.
+
+        nodes counts the branches tried, backtracks the branch points given up
+        after all their alternatives failed, max_depth the deepest stack of
+        branch points and elapsed the wall time in seconds.
+
+        A solve can be capped by timeout (seconds from the start of the solve),
+        deadline (a time.monotonic() value), max_nodes, or cancel, any object
+        with is_set() such as a threading.Event set from another thread. Limits
+        are checked every CHECK_INTERVAL nodes. A stopped solve returns False,
+        leaves the board as it was and sets status to "deadline", "node_limit"
+        or "cancelled" instead of "solved" or "unsolvable".
+    """
+
+    CHECK_INTERVAL = 256
+
+    def __init__(self, timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 max_nodes: Optional[int] = None, cancel=None):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.cancel = cancel
+        self.nodes = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.elapsed = 0.0
+        self.status = None
+        self._started = 0.0
+        self._stop_at = None
+
+    def start(self) -> None:
+        """Reset the counters and start the clock."""
+        self.nodes = self.backtracks = self.max_depth = 0
+        self.status = None
+        self._started = time.perf_counter()
+        self._stop_at = self.deadline
+        if self.timeout is not None:
+            stop_at = time.monotonic() + self.timeout
+            self._stop_at = stop_at if self._stop_at is None else min(self._stop_at, stop_at)
+
+    def _next_check(self) -> int:
+        check = self.nodes + self.CHECK_INTERVAL
+        if self.max_nodes is not None:
+            check = min(check, self.max_nodes)
+        return check
+
+    def checkpoint(self, nodes: int) -> int:
+        """Called by a search every so often. Returns the node count of the next check, or 0 to stop."""
+        self.nodes = nodes
+        if self.cancel is not None and self.cancel.is_set():
+            self.status = "cancelled"
+        elif self.max_nodes is not None and nodes >= self.max_nodes:
+            self.status = "node_limit"
+        elif self._stop_at is not None and time.monotonic() >= self._stop_at:
+            self.status = "deadline"
+        else:
+            return self._next_check()
+        return 0
+
+    def finish(self, solved: bool) -> None:
+        """Stop the clock and record the outcome, unless a limit already did."""
+        self.elapsed = time.perf_counter() - self._started
+        if self.status is None:
+            self.status = "solved" if solved else "unsolvable"
+
+    @property
+    def aborted(self) -> bool:
+        """True if a limit stopped the search before it could finish."""
+        return self.status in ("deadline", "node_limit", "cancelled")
+
+    def as_dict(self) -> dict:
+        return {"status": self.status, "nodes": self.nodes, "backtracks": self.backtracks,
+                "max_depth": self.max_depth, "elapsed": self.elapsed}
+
+    def __repr__(self):
+        return (f"SearchStats(status={self.status!r}, nodes={self.nodes}, backtracks={self.backtracks}, "
+                f"max_depth={self.max_depth}, elapsed={self.elapsed:.6f})")
+
+
+def solveSudoku(board: List[List[str]], strategy: str = "backtrack", stats: Optional[SearchStats] = None,
+                cache: Optional['SolutionCache'] = None) -> bool:
+    """
+        Solve the board in place. Returns False if the board has no solution.
+
+        Any n x n board with n = box * box works (4x4, 9x9, 16x16, 25x25, ...);
+        cells hold the tokens "1" to str(n), or '.' when empty.
+
+        strategy selects the engine: "backtrack" fills cells in row-major order,
+        "propagate" uses constraint propagation and branches on the most
+        constrained cell, which is far faster on hard puzzles and the one to use
+        for large grids, and "dlx" solves the exact-cover form with Dancing Links.
+
+        Pass a SearchStats to get node, backtrack, depth and timing counters
+        back, or to cap the solve with a timeout, node budget or cancel token.
+        Pass a SolutionCache to reuse the solutions of puzzles seen before,
+        including symmetric copies of them.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}.")
+    if cache is not None:
+        return cache.solve(board, strategy, stats)
+
+    if stats is None:
+        return STRATEGIES[strategy](board)
+    stats.start()
+    solved = STRATEGIES[strategy](board, stats)
+    stats.finish(solved)
+    return solved
+
+def solve_backtrack(board: List[List[str]], stats: Optional[SearchStats] = None) -> bool:
+    """Solve the board in place with plain row-major backtracking."""
+    geo = board_geometry(board)
+    rows = [0] * geo.n
+    cols = [0] * geo.n
+    boxes = [0] * geo.n
+
+    # Gather all the numbers in the board into the row, column and box masks
+    for cell, bit in givens(board, geo):
+        r = cell // geo.n
+        c = cell % geo.n
+        b = geo.box_of[cell]
+        if (rows[r] | cols[c] | boxes[b]) & bit:
+            # The digit is already given in this row, column or box
+            return False
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+
+    return solve(board, rows, cols, boxes, geo, stats)
+
+def solve(board: List[List[str]], rows: List[int], cols: List[int], boxes: List[int], geo: Geometry,
+          stats: Optional[SearchStats] = None) -> bool:
+    """
+        Fill the empty cells in row-major order, trying the lowest free digit first.
+
+        The search keeps its own stack of the digits left to try for each empty
+        cell instead of recursing, so given cells cost nothing and each step is
+        a few mask operations rather than a Python call. Digits are written to
+        the board only once it is solved, so on failure, or when a limit in
+        stats stops it, the board is left as it was.
+    """
+    n = geo.n
+    all_digits = geo.all_digits
+    empties = [cell for cell in range(geo.cells) if board[cell // n][cell % n] == '.']
+    if not empties:
         return True
 
-    row = cellNo // 9
-    col = cellNo % 9
-    
-    # If the current cell is not empty, skip it
-    if board[row][col] != '.':
-        return solve(cellNo + 1, board, numBoard)
-
-    # If the current cell is empty, try to fill it
-    for num in range(1, 10):
-        val = str(num)
-        subBox_i = row // 3
-        subBox_j = col // 3
-        box_index = [subBox_i, subBox_j]
-
-        can_place = True
-        if val in numBoard:
-            for pos in numBoard[val]:
-                # Check if the number is in the same row, column, or box
-                if pos[0] == row or pos[1] == col or pos[2] == box_index:
-                    can_place = False
+    # Row, column and box of the empty cell at each depth
+    rs = [cell // n for cell in empties]
+    cs = [cell % n for cell in empties]
+    bs = [geo.box_of[cell] for cell in empties]
+    total = len(empties)
+    free = [0] * total    # Digits still to try at each depth
+    placed = [0] * total  # Digit currently placed at each depth
+    nodes = backtracks = max_depth = 0
+    check = stats.checkpoint(0) if stats is not None else -1
+    if not check:
+        # A limit was hit before the search began, so leave the board alone
+        return False
+    solved = False
+
+    depth = 0
+    free[0] = ~(rows[rs[0]] | cols[cs[0]] | boxes[bs[0]]) & all_digits
+    while True:
+        r = rs[depth]
+        c = cs[depth]
+        b = bs[depth]
+
+        # Take back the digit tried here before, clearing its bit is O(1)
+        bit = placed[depth]
+        if bit:
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+
+        f = free[depth]
+        if not f:
+            # Every digit failed here, back up to the previous empty cell
+            placed[depth] = 0
+            backtracks += 1
+            depth -= 1
+            if depth < 0:
+                break
+            continue
+
+        # Take the lowest free digit and place it
+        bit = f & -f
+        free[depth] = f ^ bit
+        placed[depth] = bit
+        rows[r] |= bit
+        cols[c] |= bit
+        boxes[b] |= bit
+        nodes += 1
+
+        if nodes == check:
+            check = stats.checkpoint(nodes)
+            if not check:
+                break
+
+        depth += 1
+        if depth == total:
+            solved = True
+            break
+        if depth > max_depth:
+            max_depth = depth
+
+        # The digits still free for the next cell are the ones not used in its row, column or box
+        free[depth] = ~(rows[rs[depth]] | cols[cs[depth]] | boxes[bs[depth]]) & all_digits
+        placed[depth] = 0
+
+    if solved:
+        symbols = geo.symbols
+        for depth in range(total):
+            board[rs[depth]][cs[depth]] = symbols[placed[depth].bit_length() - 1]
+    if stats is not None:
+        stats.nodes = nodes
+        stats.backtracks = backtracks
+        stats.max_depth = max_depth
+    return solved
+
+
+class CandidateGrid:
+    """
+        Candidate bitmasks for every cell, solved by constraint propagation.
+
+        Besides the masks the grid keeps, for each unit and digit, how many cells
+        of the unit still allow the digit (its places), and buckets of both cells
+        and unit-digits by those counts. Hidden singles and the most constrained
+        choice are then found without scanning the board, so the work per search
+        node stays nearly flat as the grid grows. Propagation runs from a work
+        list rather than by recursion, which keeps 25x25 and larger grids clear
+        of the recursion limit.
+
+        Every change to a cell's candidates is recorded on a trail as
+        (cell, previous mask), so a failed branch is undone by popping the trail
+        back to a mark instead of copying the grid.
+    """
+
+    def __init__(self, geo: Optional[Geometry] = None):
+        self.geo = geo or geometry(3)
+        n = self.geo.n
+        cells = self.geo.cells
+        self.cands = [self.geo.all_digits] * cells
+        self.sizes = [n] * cells
+        self.places = [n] * (3 * n * n)  # places[unit * n + digit index]
+        self.buckets = [set() for _ in range(n + 1)]
+        self.buckets[n].update(range(cells))
+        self.place_buckets = [set() for _ in range(n + 1)]
+        self.place_buckets[n].update(range(3 * n * n))
+        self.trail = []
+        self.nodes = 0       # Branches tried by search()
+        self.backtracks = 0  # Branch points given up after every alternative failed
+        self.max_depth = 0   # Deepest stack of branch points
+
+    def _count_places(self, cell: int, digits: int, delta: int) -> None:
+        """Add delta to the places of each digit in `digits` across the cell's three units."""
+        n = self.geo.n
+        places = self.places
+        place_buckets = self.place_buckets
+        units = self.geo.cell_units[cell]
+        while digits:
+            low = digits & -digits
+            digits ^= low
+            d = low.bit_length() - 1
+            for unit in units:
+                index = unit * n + d
+                place_buckets[places[index]].discard(index)
+                places[index] += delta
+                place_buckets[places[index]].add(index)
+
+    def undo(self, mark: int) -> None:
+        """Restore the candidates to how they were when the trail had `mark` entries."""
+        cands, sizes, buckets, trail = self.cands, self.sizes, self.buckets, self.trail
+        while len(trail) > mark:
+            cell, mask = trail.pop()
+            removed = mask & ~cands[cell]
+            cands[cell] = mask
+            buckets[sizes[cell]].discard(cell)
+            sizes[cell] = bin(mask).count('1')
+            buckets[sizes[cell]].add(cell)
+            self._count_places(cell, removed, 1)
+
+    def _remove(self, cell: int, bits: int, work: list) -> bool:
+        """Remove digits from a cell, queueing the singles this creates. False on a contradiction."""
+        cands = self.cands
+        mask = cands[cell]
+        removed = mask & bits
+        if not removed:
+            return True
+        mask ^= removed
+        if not mask:
+            return False
+        self.trail.append((cell, cands[cell]))
+        cands[cell] = mask
+        self.buckets[self.sizes[cell]].discard(cell)
+        self.sizes[cell] = size = bin(mask).count('1')
+        self.buckets[size].add(cell)
+        self._count_places(cell, removed, -1)
+
+        # Naked single: the cell has one digit left, so no peer can use it
+        if size == 1:
+            work.append((-1, cell))
+
+        # Hidden single: a unit where a removed digit now fits in only one cell
+        n = self.geo.n
+        places = self.places
+        while removed:
+            low = removed & -removed
+            removed ^= low
+            d = low.bit_length() - 1
+            for unit in self.geo.cell_units[cell]:
+                count = places[unit * n + d]
+                if not count:
+                    return False
+                if count == 1:
+                    work.append((unit, low))
+        return True
+
+    def _propagate(self, work: list) -> bool:
+        """Drain the work list of naked and hidden singles. False on a contradiction."""
+        cands = self.cands
+        peers = self.geo.peers
+        units = self.geo.units
+        while work:
+            unit, item = work.pop()
+            if unit < 0:
+                bit = cands[item]
+                for peer in peers[item]:
+                    if cands[peer] & bit and not self._remove(peer, bit, work):
+                        return False
+            else:
+                for cell in units[unit]:
+                    if cands[cell] & item:
+                        if cands[cell] != item and not self._remove(cell, cands[cell] ^ item, work):
+                            return False
+                        break
+                else:
+                    return False
+        return True
+
+    def assign(self, cell: int, bit: int) -> bool:
+        """Fix the cell to a digit by eliminating every other candidate. False on a contradiction."""
+        work = []
+        return self._remove(cell, self.cands[cell] & ~bit, work) and self._propagate(work)
+
+    def eliminate(self, cell: int, bit: int) -> bool:
+        """Remove a digit from the cell's candidates and propagate singles. False on a contradiction."""
+        work = []
+        return self._remove(cell, bit, work) and self._propagate(work)
+
+    def choices(self) -> List[Tuple[int, int]]:
+        """
+            The (cell, digit bit) alternatives of the most constrained open choice.
+
+            That is either the unsolved cell with the fewest candidates or the
+            unit-digit with the fewest places left, whichever has fewer options.
+            The alternatives are disjoint and cover every solution. An empty
+            list means every cell is solved.
+        """
+        n = self.geo.n
+        cands = self.cands
+        for size in range(2, n + 1):
+            if self.buckets[size]:
+                cell = next(iter(self.buckets[size]))
+                mask = cands[cell]
+                options = []
+                while mask:
+                    bit = mask & -mask
+                    mask ^= bit
+                    options.append((cell, bit))
+                return options
+            if self.place_buckets[size]:
+                unit, d = divmod(next(iter(self.place_buckets[size])), n)
+                bit = 1 << d
+                return [(cell, bit) for cell in self.geo.units[unit] if cands[cell] & bit]
+        return []
+
+    def solutions(self, rng: Optional[random.Random] = None, stats: Optional[SearchStats] = None) -> Iterator[None]:
+        """
+            Search with an explicit stack, pausing at every solution while the grid holds it.
+
+            Branches are tried in a fixed order, or shuffled when an rng is given.
+            The search ends early if a limit in stats is hit. Once the generator
+            is exhausted the grid is left part-way undone, so callers that keep
+            using it should undo to their own mark.
+        """
+        stack = []  # (alternatives, index of the next one, trail mark) per branch point
+        check = stats.checkpoint(self.nodes) if stats is not None else -1
+        if not check:
+            return
+        while True:
+            options = self.choices()
+            if not options:
+                yield
+            else:
+                if rng is not None:
+                    rng.shuffle(options)
+                stack.append((options, 0, len(self.trail)))
+                if len(stack) > self.max_depth:
+                    self.max_depth = len(stack)
+
+            # Try the next alternative of the deepest branch point, backing up when it runs out
+            while True:
+                if not stack:
+                    return
+                options, index, mark = stack.pop()
+                if index == len(options):
+                    self.backtracks += 1
+                    continue
+                self.undo(mark)
+                stack.append((options, index + 1, mark))
+                self.nodes += 1
+                if self.nodes == check:
+                    check = stats.checkpoint(self.nodes)
+                    if not check:
+                        return
+                if self.assign(*options[index]):
                     break
 
-        # if its a valid move set the cell to the number
-        if can_place:
-            board[row][col] = val
-            
-            # Update the numBoard dictionary if the number is not in the dictionary; otherwise append to the list
-            if val not in numBoard:
-                numBoard[val] = [[row, col, box_index]]
+    def search(self, rng: Optional[random.Random] = None, stats: Optional[SearchStats] = None) -> bool:
+        """Branch on the most constrained choice until every cell is solved."""
+        for _ in self.solutions(rng, stats):
+            return True
+        return False
+
+    def count(self, limit: Optional[int] = None) -> int:
+        """Count the solutions reachable from the current state, stopping once `limit` are found."""
+        mark = len(self.trail)
+        found = 0
+        for _ in self.solutions():
+            found += 1
+            if found == limit:
+                break
+        self.undo(mark)
+        return found
+
+    @classmethod
+    def from_board(cls, board: List[List[str]]) -> Optional['CandidateGrid']:
+        """A propagated grid holding the board's givens, or None if they contradict each other."""
+        geo = board_geometry(board)
+        grid = cls(geo)
+        for cell, bit in givens(board, geo):
+            if not grid.assign(cell, bit):
+                return None
+        return grid
+
+def solve_propagate(board: List[List[str]], stats: Optional[SearchStats] = None) -> bool:
+    """Solve the board in place with naked/hidden singles and fewest-candidates branching."""
+    grid = CandidateGrid.from_board(board)
+    if grid is None:
+        return False
+    solved = grid.search(stats=stats)
+    if stats is not None:
+        stats.nodes = grid.nodes
+        stats.backtracks = grid.backtracks
+        stats.max_depth = grid.max_depth
+    if not solved:
+        return False
+
+    n = grid.geo.n
+    for cell, mask in enumerate(grid.cands):
+        board[cell // n][cell % n] = grid.geo.symbols[mask.bit_length() - 1]
+    return True
+
+def count_solutions(board: List[List[str]], limit: Optional[int] = 2) -> int:
+    """
+        Count the board's solutions, stopping early once `limit` have been found.
+
+        With the default limit of 2 this is a uniqueness check: 0 means no
+        solution, 1 a proper puzzle and 2 more than one solution.
+    """
+    grid = CandidateGrid.from_board(board)
+    if grid is None:
+        return 0
+    return grid.count(limit)
+
+def generate_puzzle(clues: int = 0, box: int = 3, seed: Optional[int] = None) -> Tuple[List[List[str]], List[List[str]]]:
+    """
+        Generate a random puzzle with a unique solution, returning (puzzle, solution).
+
+        Starting from a random full grid, clues are removed in random order as
+        long as the solution stays unique, until `clues` remain or no clue can
+        be removed without losing uniqueness, so the result is minimal whenever
+        the target is not reached first.
+
+        Removing clue c = v from a unique puzzle keeps it unique exactly when no
+        solution has c != v, so each removal is checked by one search for such a
+        solution rather than a full count. The grid is not rebuilt for each
+        check either: clues are placed in reverse removal order, so the next
+        candidate for removal is always undone straight off the trail, keeping
+        the propagation of all clues below it.
+    """
+    rng = random.Random(seed)
+    geo = geometry(box)
+    n = geo.n
+
+    grid = CandidateGrid(geo)
+    grid.search(rng)
+    solution = list(grid.cands)
+
+    order = list(range(geo.cells))
+    rng.shuffle(order)
+
+    # Place the clues with the first one to try last, noting the trail mark before each
+    grid = CandidateGrid(geo)
+    marks = {}
+    for cell in reversed(order):
+        marks[cell] = len(grid.trail)
+        grid.assign(cell, solution[cell])
+
+    kept = []
+    remaining = geo.cells
+    for cell in order:
+        if remaining <= clues:
+            kept.append(cell)
+            continue
+
+        # Drop this clue (and everything placed after it), then restore the clues already kept
+        grid.undo(marks[cell])
+        for other in kept:
+            grid.assign(other, solution[other])
+        base = len(grid.trail)
+
+        unique = not (grid.eliminate(cell, solution[cell]) and grid.search())
+        grid.undo(base)
+        if unique:
+            remaining -= 1
+        else:
+            kept.append(cell)
+            grid.assign(cell, solution[cell])
+
+    puzzle = [['.'] * n for _ in range(n)]
+    answer = [['.'] * n for _ in range(n)]
+    for cell in range(geo.cells):
+        answer[cell // n][cell % n] = geo.symbols[solution[cell].bit_length() - 1]
+    for cell in kept:
+        puzzle[cell // n][cell % n] = answer[cell // n][cell % n]
+    return puzzle, answer
+
+# Dancing Links (Knuth's Algorithm X) over the exact-cover form of Sudoku.
+# For an n x n board there are 4 * n * n constraint columns: each cell is
+# filled once and each digit appears once per row, column and box. Each of the
+# n ** 3 (cell, digit) candidates is a matrix row with exactly four nodes, one
+# per constraint. Node 0 is the root, 1 to 4 * n * n are the column headers and
+# the candidate nodes follow, so row r owns the four nodes from first + 4 * r.
+
+def _dlx_row_columns(row: int, geo: Geometry) -> List[int]:
+    """The four constraint columns covered by candidate row = cell * n + digit index."""
+    n = geo.n
+    cell, d = divmod(row, n)
+    return [1 + cell,
+            1 + n * n + (cell // n) * n + d,
+            1 + 2 * n * n + (cell % n) * n + d,
+            1 + 3 * n * n + geo.box_of[cell] * n + d]
+
+@lru_cache(maxsize=None)
+def _dlx_template(box: int):
+    """Build the full link arrays for a box size once; every puzzle starts from a copy of them."""
+    geo = geometry(box)
+    columns = 4 * geo.cells
+    first = columns + 1
+    nodes = first + geo.cells * geo.n * 4
+    L = list(range(-1, nodes - 1))
+    R = list(range(1, nodes + 1))
+    U = list(range(nodes))
+    D = list(range(nodes))
+    C = list(range(nodes))
+    S = [0] * first
+
+    # Column headers form a circular list through the root
+    L[0] = columns
+    R[columns] = 0
+
+    for row in range(geo.cells * geo.n):
+        start = first + row * 4
+        for k, col in enumerate(_dlx_row_columns(row, geo)):
+            node = start + k
+            # Circular row list of the four nodes
+            L[node] = start + (k - 1) % 4
+            R[node] = start + (k + 1) % 4
+            # Append at the bottom of the column
+            C[node] = col
+            U[node] = U[col]
+            D[node] = col
+            D[U[col]] = node
+            U[col] = node
+            S[col] += 1
+    return L, R, U, D, C, S
+
+class DancingLinks:
+    """
+        Exact-cover solver for one Sudoku board.
+
+        The links live in flat integer lists (left, right, up, down, column and
+        column sizes) copied from the per-size template, so setting up a puzzle
+        is six list copies and tearing it down is just dropping them.
+    """
+
+    def __init__(self, board: List[List[str]]):
+        self.geo = geo = board_geometry(board)
+        self.first = 4 * geo.cells + 1
+        self.L, self.R, self.U, self.D, self.C, self.S = (list(links) for links in _dlx_template(geo.box))
+        self.givens = []
+        self.consistent = True
+        self.nodes = 0       # Rows tried by solutions()
+        self.backtracks = 0  # Columns given up after every row in them failed
+        self.max_depth = 0   # Deepest stack of chosen columns
+
+        # Select the row of every given digit, covering its four columns
+        covered = set()
+        for cell, bit in givens(board, geo):
+            row = cell * geo.n + bit.bit_length() - 1
+            columns = _dlx_row_columns(row, geo)
+            if covered.intersection(columns):
+                self.consistent = False
+                return
+            covered.update(columns)
+            for col in columns:
+                self.cover(col)
+            self.givens.append(row)
+
+    def cover(self, c: int) -> None:
+        """Unlink column c and every row that uses it."""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        L[R[c]] = L[c]
+        R[L[c]] = R[c]
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, c: int) -> None:
+        """Relink column c, exactly reversing cover(c)."""
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.S
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+        L[R[c]] = c
+        R[L[c]] = c
+
+    def solutions(self, stats: Optional[SearchStats] = None):
+        """Yield every solution as a list of the selected candidate rows, one per cell, until a limit in stats is hit."""
+        if not self.consistent:
+            return
+        check = stats.checkpoint(self.nodes) if stats is not None else -1
+        if not check:
+            return
+        R, D, L, C, S = self.R, self.D, self.L, self.C, self.S
+        cover, uncover = self.cover, self.uncover
+        cols = []   # Column chosen at each depth
+        rows = []   # Node of the row being tried at each depth (the column header before the first)
+
+        while True:
+            if R[0] == 0:
+                yield self.givens + [(node - self.first) // 4 for node in rows]
             else:
-                numBoard[val].append([row, col, box_index])
-        
-            if solve(cellNo + 1, board, numBoard):
-                return True
-        
-        # If the number cannot be placed, backtrack
-        board[row][col] = '.'
-
-        # If the number position is in the dictionary, remove the cell from the list
-        if [row, col, box_index] in numBoard[val]:
-            numBoard[val].remove([row, col, box_index])
-
-    return False
-    
-
-
-def main():
-    board = [["5","3",".",".","7",".",".",".","."],
-             ["6",".",".","1","9","5",".",".","."],
-             [".","9","8",".",".",".",".","6","."],
-             ["8",".",".",".","6",".",".",".","3"],
-             ["4",".",".","8",".","3",".",".","1"],
-             ["7",".",".",".","2",".",".",".","6"],
-             [".","6",".",".",".",".","2","8","."],
-             [".",".",".","4","1","9",".",".","5"],
-             [".",".",".",".","8",".",".","7","9"]]
-             
-    solveSudoku(board)
+                # Branch on the column with the fewest remaining rows
+                c = R[0]
+                best = c
+                while c != 0:
+                    if S[c] < S[best]:
+                        best = c
+                        if S[c] <= 1:
+                            break
+                    c = R[c]
+                cover(best)
+                cols.append(best)
+                rows.append(best)
+                if len(cols) > self.max_depth:
+                    self.max_depth = len(cols)
+
+            # Move the deepest level on to its next row, backing up when a column is exhausted
+            while True:
+                if not cols:
+                    return
+                c = cols[-1]
+                r = rows[-1]
+                if r != c:
+                    j = L[r]
+                    while j != r:
+                        uncover(C[j])
+                        j = L[j]
+                r = D[r]
+                if r == c:
+                    uncover(c)
+                    cols.pop()
+                    rows.pop()
+                    self.backtracks += 1
+                    continue
+                rows[-1] = r
+                self.nodes += 1
+                if self.nodes == check:
+                    check = stats.checkpoint(self.nodes)
+                    if not check:
+                        return
+                j = R[r]
+                while j != r:
+                    cover(C[j])
+                    j = R[j]
+                break
+
+def dlx_solutions(board: List[List[str]]):
+    """Yield every solution of the board as a new board, using Dancing Links."""
+    links = DancingLinks(board)
+    n = links.geo.n
+    for rows in links.solutions():
+        solved = [['.'] * n for _ in range(n)]
+        for row in rows:
+            cell, d = divmod(row, n)
+            solved[cell // n][cell % n] = links.geo.symbols[d]
+        yield solved
+
+def solve_dlx(board: List[List[str]], stats: Optional[SearchStats] = None) -> bool:
+    """Solve the board in place with Dancing Links."""
+    links = DancingLinks(board)
+    n = links.geo.n
+    solved = False
+    for rows in links.solutions(stats):
+        for row in rows:
+            cell, d = divmod(row, n)
+            board[cell // n][cell % n] = links.geo.symbols[d]
+        solved = True
+        break
+    if stats is not None:
+        stats.nodes = links.nodes
+        stats.backtracks = links.backtracks
+        stats.max_depth = links.max_depth
+    return solved
+
+STRATEGIES = {
+    "backtrack": solve_backtrack,
+    "propagate": solve_propagate,
+    "dlx": solve_dlx,
+}
+
+
+# Result cache. Many puzzles arrive again unchanged or as a symmetric copy of
+# an earlier one: digits relabelled, rows swapped within a band, bands swapped,
+# the same for columns and stacks, or the grid transposed. canonical_form()
+# maps all such copies to one representative so a SolutionCache keyed on it
+# solves each class once.
+
+class Transform:
+    """
+        A Sudoku symmetry: an optional transposition, then a new order of the
+        rows and of the columns, then a relabelling of the symbols.
+    """
+
+    def __init__(self, transpose: bool, rows: List[int], cols: List[int], relabel: dict):
+        self.transpose = transpose
+        self.rows = rows
+        self.cols = cols
+        self.relabel = relabel
+
+    def apply(self, board: List[List[str]]) -> List[List[str]]:
+        """Return the transformed copy of a board."""
+        if self.transpose:
+            board = [list(line) for line in zip(*board)]
+        return [[self.relabel[board[r][c]] for c in self.cols] for r in self.rows]
+
+    def invert(self, board: List[List[str]]) -> List[List[str]]:
+        """Map a board in the transformed frame back to the original one."""
+        inverse = {new: old for old, new in self.relabel.items()}
+        n = len(board)
+        result = [['.'] * n for _ in range(n)]
+        for i, r in enumerate(self.rows):
+            for j, c in enumerate(self.cols):
+                result[r][c] = inverse[board[i][j]]
+        if self.transpose:
+            result = [list(line) for line in zip(*result)]
+        return result
+
+def _tied_orders(items: List[int], key) -> List[List[int]]:
+    """Every ordering of items sorted by key, i.e. all permutations within runs of equal keys."""
+    ordered = sorted(items, key=key)
+    runs = [list(group) for _, group in groupby(ordered, key=key)]
+    return [[item for run in choice for item in run] for choice in product(*(permutations(run) for run in runs))]
+
+def _tie_count(items: List[int], key) -> int:
+    count = 1
+    for _, group in groupby(sorted(items, key=key), key=key):
+        count *= factorial(len(list(group)))
+    return count
+
+def _line_orders(keys: List[tuple], box: int, limit: int) -> List[List[int]]:
+    """
+        The orders of the rows (or columns) that sort bands, and lines within
+        each band, by their invariant keys. Only the first is returned if
+        there are more than limit.
+    """
+    bands = [list(range(band * box, band * box + box)) for band in range(box)]
+    band_keys = [tuple(sorted(keys[line] for line in band)) for band in bands]
+    line_key = keys.__getitem__
+    count = _tie_count(list(range(box)), band_keys.__getitem__)
+    for band in bands:
+        count *= _tie_count(band, line_key)
+    if count > limit:
+        band_order = sorted(range(box), key=band_keys.__getitem__)
+        return [[line for band in band_order for line in sorted(bands[band], key=line_key)]]
+
+    orders = []
+    for band_order in _tied_orders(list(range(box)), band_keys.__getitem__):
+        for choice in product(*(_tied_orders(bands[band], line_key) for band in band_order)):
+            orders.append([line for lines in choice for line in lines])
+    return orders
+
+def _relabelled(board: List[List[str]], rows: List[int], cols: List[int], symbols: List[str],
+                best: Optional[List[str]]) -> Optional[Tuple[List[str], dict]]:
+    """
+        The cells in the given order with symbols renamed by first appearance,
+        or None as soon as the result is known to be larger than best.
+    """
+    relabel = {'.': '.'}
+    cells = []
+    smaller = best is None
+    for r in rows:
+        line = board[r]
+        for c in cols:
+            token = line[c]
+            new = relabel.get(token)
+            if new is None:
+                new = relabel[token] = symbols[len(relabel) - 1]
+            if not smaller:
+                other = best[len(cells)]
+                if new > other:
+                    return None
+                smaller = new < other
+            cells.append(new)
+    return cells, relabel
+
+def canonical_form(board: List[List[str]], max_candidates: int = 4096) -> Tuple[str, Transform]:
+    """
+        The canonical puzzle string of a board and the Transform that maps the board onto it.
+
+        Rows and columns are ranked by invariants that no symmetry changes:
+        their clue count and the clue counts of the lines crossing their clues.
+        Bands, stacks and the transposition follow from those. Among all
+        arrangements that tie on the invariants, the lexicographically smallest
+        relabelled grid wins, so every symmetric copy of a puzzle gets the same
+        form. When more than max_candidates arrangements tie, only one is tried.
+        The form is then still a faithful transform of the board, but copies
+        may land on different forms.
+    """
+    geo = board_geometry(board)
+    n = geo.n
+    check_givens(board, geo)
+    best = None
+    best_transform = None
+
+    orientations = []
+    for transpose in (False, True):
+        grid = [list(line) for line in zip(*board)] if transpose else board
+        row_counts = [sum(token != '.' for token in line) for line in grid]
+        col_counts = [sum(grid[r][c] != '.' for r in range(n)) for c in range(n)]
+        row_keys = [(row_counts[r], tuple(sorted(col_counts[c] for c in range(n) if grid[r][c] != '.')))
+                    for r in range(n)]
+        col_keys = [(col_counts[c], tuple(sorted(row_counts[r] for r in range(n) if grid[r][c] != '.')))
+                    for c in range(n)]
+        signature = (sorted(row_keys), sorted(col_keys))
+        orientations.append((signature, transpose, grid, row_keys, col_keys))
+
+    # Only orientations with the smallest invariant signature can give the canonical form
+    smallest = min(signature for signature, *_ in orientations)
+    orientations = [entry for entry in orientations if entry[0] == smallest]
+    limit = max(1, max_candidates // len(orientations))
+
+    for _, transpose, grid, row_keys, col_keys in orientations:
+        row_orders = _line_orders(row_keys, geo.box, limit)
+        col_orders = _line_orders(col_keys, geo.box, max(1, limit // len(row_orders)))
+        for rows in row_orders:
+            for cols in col_orders:
+                result = _relabelled(grid, rows, cols, geo.symbols, best)
+                if result is not None:
+                    best, relabel = result
+                    best_transform = Transform(transpose, rows, cols, relabel)
+
+    # Symbols missing from the puzzle take the remaining canonical symbols in order
+    relabel = best_transform.relabel
+    unused = iter(symbol for symbol in geo.symbols if symbol not in relabel.values())
+    for symbol in geo.symbols:
+        if symbol not in relabel:
+            relabel[symbol] = next(unused)
+
+    separator = '' if n <= 9 else ' '
+    return separator.join(best), best_transform
+
+class SolutionCache:
+    """
+        Bounded LRU cache of solutions keyed on the canonical form of the puzzle.
+
+        Puzzles without a solution are cached too. Optionally backed by a dbm
+        file at `path`: every new result is written through to it, and memory
+        misses fall back to it, so the cache survives restarts. Only the
+        in-memory tier is bounded by maxsize. hits, misses and evictions are
+        counted, with disk_hits as the misses the file answered.
+    """
+
+    def __init__(self, maxsize: int = 100000, path: Optional[str] = None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.disk = dbm.open(path, 'c') if path is not None else None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached canonical solution ('' if unsolvable) for a canonical puzzle, or None."""
+        solution = self.entries.get(key)
+        if solution is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return solution
+        if self.disk is not None:
+            stored = self.disk.get(key.encode())
+            if stored is not None:
+                self.disk_hits += 1
+                self._remember(key, stored.decode())
+                return stored.decode()
+        self.misses += 1
+        return None
+
+    def put(self, key: str, solution: str) -> None:
+        """Cache a canonical solution, '' meaning the puzzle has none."""
+        self._remember(key, solution)
+        if self.disk is not None:
+            self.disk[key.encode()] = solution.encode()
+
+    def _remember(self, key: str, solution: str) -> None:
+        self.entries[key] = solution
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, board: List[List[str]], strategy: str = "propagate", stats: Optional[SearchStats] = None) -> bool:
+        """Solve the board in place through the cache, like solveSudoku."""
+        key, transform = canonical_form(board)
+        solution = self.get(key)
+        if solution is None:
+            canonical = transform.apply(board)
+            solved = solveSudoku(canonical, strategy, stats)
+            if stats is not None and stats.aborted:
+                return False
+            solution = format_board(canonical) if solved else ''
+            self.put(key, solution)
+        elif stats is not None:
+            stats.start()
+            stats.finish(bool(solution))
+
+        if not solution:
+            return False
+        solved = transform.invert(parse_puzzle(solution))
+        for r, line in enumerate(solved):
+            board[r][:] = line
+        return True
+
+    def info(self) -> dict:
+        return {"size": len(self.entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses,
+                "disk_hits": self.disk_hits, "evictions": self.evictions}
+
+    def close(self) -> None:
+        if self.disk is not None:
+            self.disk.close()
+            self.disk = None
+
+
+# Bulk solving. A 9x9 puzzle is exchanged as an 81-character string in
+# row-major order with '.' or '0' for blanks, the format used by most puzzle
+# collections. Larger grids need multi-digit symbols, so they are written as
+# whitespace-separated tokens ("12 . 3 16 ...") in the same order.
+
+def _puzzle_tokens(text: str) -> Optional[List[str]]:
+    """Split a puzzle string into its cell tokens, or None if it is not a valid puzzle."""
+    text = text.strip()
+    tokens = text.split() if any(ch.isspace() for ch in text) else list(text)
+    n = isqrt(len(tokens))
+    box = isqrt(n)
+    if box < 2 or box * box != n or n * n != len(tokens):
+        return None
+    bits = geometry(box).bits
+    tokens = ['.' if token == '0' else token for token in tokens]
+    if any(token != '.' and token not in bits for token in tokens):
+        return None
+    return tokens
+
+def parse_puzzle(text: str) -> List[List[str]]:
+    """Turn a puzzle string (81 characters, or n * n tokens for other sizes) into a board."""
+    tokens = _puzzle_tokens(text)
+    if tokens is None:
+        raise ValueError(f"Not a puzzle: {text!r}")
+    n = isqrt(len(tokens))
+    return [tokens[row * n:row * n + n] for row in range(n)]
+
+def format_board(board: List[List[str]]) -> str:
+    """Turn a board back into a puzzle string; boards larger than 9x9 are space-separated."""
+    separator = '' if len(board) <= 9 else ' '
+    return separator.join(separator.join(row) for row in board)
+
+def read_puzzles(lines: Iterable[str]) -> Iterator[str]:
+    """
+        Yield the puzzles from a file or stream lazily, one per line.
+
+        Lines are either a bare puzzle string or CSV with the puzzle in the
+        first field. Blank lines and # comments are skipped, and so is a CSV
+        header on the first line.
+    """
+    for lineNo, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        puzzle = line.split(',', 1)[0].strip()
+        if _puzzle_tokens(puzzle) is None:
+            if lineNo == 1 and ',' in line:
+                continue
+            raise ValueError(f"Line {lineNo} is not a puzzle: {line!r}")
+        yield puzzle
+
+def solve_puzzle(puzzle: str, strategy: str = "propagate") -> Optional[str]:
+    """Solve one puzzle string, returning the solution string or None if it has no solution."""
+    board = parse_puzzle(puzzle)
+    if not STRATEGIES[strategy](board):
+        return None
+    return format_board(board)
+
+def _batch_step(cand: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+        One round of elimination and singles over a (B, 9, 9, 9) candidate tensor.
+
+        Returns the new tensor and a (B,) mask of boards that hit a contradiction.
+    """
+    boards = cand.shape[0]
+
+    # Eliminate every placed digit from the rest of its row, column and box
+    singles = cand & (cand.sum(axis=3, keepdims=True) == 1)
+    row_has = singles.any(axis=2)[:, :, None, :]
+    col_has = singles.any(axis=1)[:, None, :, :]
+    box_has = singles.reshape(boards, 3, 3, 3, 3, 9).any(axis=(2, 4))
+    box_has = np.repeat(np.repeat(box_has, 3, axis=1), 3, axis=2)
+    cand = cand & (singles | ~(row_has | col_has | box_has))
+
+    # Hidden singles: a digit with one place left in a unit goes in that place
+    in_row = cand.sum(axis=2)
+    in_col = cand.sum(axis=1)
+    in_box = cand.reshape(boards, 3, 3, 3, 3, 9).sum(axis=(2, 4))
+    hidden = (cand & (in_row[:, :, None, :] == 1)) | (cand & (in_col[:, None, :, :] == 1))
+    hidden |= cand & (np.repeat(np.repeat(in_box, 3, axis=1), 3, axis=2) == 1)
+    cand = np.where(hidden.any(axis=3, keepdims=True), hidden, cand)
+
+    # A board is dead if a cell has no candidates, a digit has no place in a
+    # unit, or a digit was placed twice in a unit
+    placed = cand & (cand.sum(axis=3, keepdims=True) == 1)
+    dead = (~cand.any(axis=3)).any(axis=(1, 2))
+    dead |= (in_row == 0).any(axis=(1, 2)) | (in_col == 0).any(axis=(1, 2)) | (in_box == 0).any(axis=(1, 2, 3))
+    dead |= (placed.sum(axis=2) > 1).any(axis=(1, 2)) | (placed.sum(axis=1) > 1).any(axis=(1, 2))
+    dead |= (placed.reshape(boards, 3, 3, 3, 3, 9).sum(axis=(2, 4)) > 1).any(axis=(1, 2, 3))
+    return cand, dead
+
+def solve_batch(puzzles: List[str], fallback: str = "propagate") -> List[Optional[str]]:
+    """
+        Solve many puzzle strings at once, returning the solutions (or None) in order.
+
+        All boards are held as one (N, 9, 9, 9) boolean candidate tensor and
+        elimination plus hidden singles run vectorized over the whole batch until
+        no board changes. Most ordinary puzzles are finished by that alone; only
+        the boards still open afterwards are handed to the `fallback` strategy,
+        starting from the digits propagation already placed.
+    """
+    if fallback not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {fallback!r}, expected one of {sorted(STRATEGIES)}.")
+    count = len(puzzles)
+    if not count:
+        return []
+
+    text = ''.join(puzzle.strip().replace('.', '0') for puzzle in puzzles)
+    if len(text) != count * 81:
+        raise ValueError("Every puzzle must have 81 characters.")
+    digits = (np.frombuffer(text.encode('ascii'), dtype=np.uint8) - ord('0')).reshape(count, 9, 9).astype(np.intp)
+    if (digits > 9).any():
+        raise ValueError("Puzzles may only contain digits and '.'.")
+
+    cand = np.ones((count, 9, 9, 9), dtype=bool)
+    given = np.nonzero(digits)
+    cand[given] = False
+    cand[given + (digits[given] - 1,)] = True
+
+    # Only boards that changed in the last round are stepped again
+    dead = np.zeros(count, dtype=bool)
+    active = np.arange(count)
+    while active.size:
+        before = cand[active]
+        after, died = _batch_step(before)
+        cand[active] = after
+        dead[active[died]] = True
+        changed = (after != before).any(axis=(1, 2, 3))
+        active = active[changed & ~died]
+
+    solutions = [None] * count
+    solved = ~dead & (cand.sum(axis=3) == 1).all(axis=(1, 2))
+    values = cand.argmax(axis=3).reshape(count, 81) + ord('1')
+    for index in np.nonzero(solved)[0]:
+        solutions[index] = values[index].astype(np.uint8).tobytes().decode('ascii')
+
+    # Scalar search for what propagation could not settle
+    for index in np.nonzero(~dead & ~solved)[0]:
+        known = cand[index].sum(axis=2) == 1
+        partial = np.where(known.reshape(81), values[index], ord('.')).astype(np.uint8).tobytes().decode('ascii')
+        solutions[index] = solve_puzzle(partial, fallback)
+    return solutions
+
+def _solve_chunk(chunk: List[str], strategy: str, vectorized: bool) -> List[Optional[str]]:
+    """Worker task: solve a chunk of puzzle strings."""
+    if not vectorized:
+        return [solve_puzzle(puzzle, strategy) for puzzle in chunk]
+    # solve_batch only takes 9x9 puzzles of 81 characters, so other sizes are solved one at a time
+    flat = [len(puzzle.strip()) == 81 for puzzle in chunk]
+    batched = iter(solve_batch([puzzle for puzzle, is_flat in zip(chunk, flat) if is_flat], strategy))
+    return [next(batched) if is_flat else solve_puzzle(puzzle, strategy) for puzzle, is_flat in zip(chunk, flat)]
+
+def _chunked(puzzles: Iterable[str], chunksize: int) -> Iterator[List[str]]:
+    puzzles = iter(puzzles)
+    while True:
+        chunk = list(islice(puzzles, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+def solve_stream(puzzles: Iterable[str], strategy: str = "propagate", processes: Optional[int] = None,
+                 chunksize: int = 256, vectorized: bool = False) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+        Solve a stream of puzzle strings, yielding (puzzle, solution) pairs in input order.
+
+        Puzzles are sent to a pool of `processes` workers (default: one per core)
+        in chunks of `chunksize`. Only a few chunks per worker are in flight at
+        once, so the input is read as fast as the solutions are consumed and a
+        corpus of any size never has to fit in memory. processes=1 solves in
+        this process without a pool.
+
+        With vectorized=True each chunk is solved by solve_batch, with
+        `strategy` as the fallback for boards propagation leaves open; use
+        chunks of a few thousand puzzles to make the batches worthwhile.
+        Puzzles of other sizes are still solved one at a time with `strategy`.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}.")
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+
+    chunks = _chunked(puzzles, chunksize)
+    if processes == 1:
+        for chunk in chunks:
+            yield from zip(chunk, _solve_chunk(chunk, strategy, vectorized))
+        return
+
+    workers = processes or os.cpu_count() or 1
+    with multiprocessing.Pool(workers) as pool:
+        # Pool.imap would pull the whole input into its task queue up front, so
+        # submit chunks ourselves and keep a bounded window of pending results.
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(_solve_chunk, (chunk, strategy, vectorized))))
+            if len(pending) >= workers * 4:
+                chunk, result = pending.popleft()
+                yield from zip(chunk, result.get())
+        while pending:
+            chunk, result = pending.popleft()
+            yield from zip(chunk, result.get())
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles. Without an input file the example board is solved.")
+    parser.add_argument("input", nargs="?",
+                        help="file with one puzzle per line (81 characters, '.' or '0' for blanks, or space-separated "
+                             "tokens for 16x16 and larger) or CSV with the puzzle in the first column; - reads stdin")
+    parser.add_argument("-o", "--output", help="write the solutions here instead of stdout")
+    parser.add_argument("-s", "--strategy", default="propagate", choices=sorted(STRATEGIES))
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="worker processes (default: one per core, 1 solves without a pool)")
+    parser.add_argument("--chunksize", type=int, default=256, help="puzzles sent to a worker at a time")
+    parser.add_argument("--vectorized", action="store_true",
+                        help="propagate each chunk as one NumPy batch and use --strategy only for the boards left open")
+    args = parser.parse_args(argv)
+
+    if args.input is None:
+        board = [["5","3",".",".","7",".",".",".","."],
+                 ["6",".",".","1","9","5",".",".","."],
+                 [".","9","8",".",".",".",".","6","."],
+                 ["8",".",".",".","6",".",".",".","3"],
+                 ["4",".",".","8",".","3",".",".","1"],
+                 ["7",".",".",".","2",".",".",".","6"],
+                 [".","6",".",".",".",".","2","8","."],
+                 [".",".",".","4","1","9",".",".","5"],
+                 [".",".",".",".","8",".",".","7","9"]]
+
+        solveSudoku(board)
+        print(board)
+        return
+
+    source = sys.stdin if args.input == '-' else open(args.input)
+    sink = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        # One solution per input puzzle, in input order; "unsolvable" marks puzzles without one
+        for _, solution in solve_stream(read_puzzles(source), args.strategy, args.processes,
+                                        args.chunksize, args.vectorized):
+            sink.write((solution or "unsolvable") + "\n")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
 
 
 